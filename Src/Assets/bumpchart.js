@@ -0,0 +1,38 @@
+/*
+ * This file contains the clientside callbacks of the bumpchart.
+ * The base figure is sent once in the layout, a genre change only restyles it in the browser.
+ */
+
+window.dash_clientside = Object.assign({}, window.dash_clientside, {
+    bumpchart: {
+        highlight_genre: function(ddm_genre, bumpchart_fig) {
+            if (ddm_genre === "All") {
+                return bumpchart_fig;
+            }
+
+            // Grey out every trace
+            var data = bumpchart_fig.data.map(function(trace) {
+                return Object.assign({}, trace, {
+                    marker: Object.assign({}, trace.marker, {color: "lightgrey"}),
+                    hoverinfo: "none"
+                });
+            });
+
+            // Highlight the trace of the genre selected
+            var genre_trace = bumpchart_fig.data.find(function(trace) {
+                return trace.name === String(ddm_genre);
+            });
+            data.push({
+                type: "scatter",
+                x: genre_trace ? genre_trace.x : [],
+                y: genre_trace ? genre_trace.y : [],
+                name: ddm_genre,
+                mode: "lines+markers",
+                marker: {symbol: "square", color: "red", size: 10},
+                hoverinfo: "skip"
+            });
+
+            return Object.assign({}, bumpchart_fig, {data: data});
+        }
+    }
+});
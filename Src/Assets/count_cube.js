@@ -0,0 +1,42 @@
+/*
+ * This file contains the functions to query in the browser the count cubes of the treemap and the table.
+ * The cube is the compact form created by preprocess_vsCommon.create_compact_count_cube.
+ */
+
+window.dash_clientside = Object.assign({}, window.dash_clientside, {
+    count_cube: {
+        // Same counts as preprocess_vsCommon.query_count_cube, for every dimension value
+        query: function(cube, genre, from_year, to_year) {
+            var n_dims = Object.values(cube.dims)[0].length;
+            var counts = new Array(n_dims).fill(0);
+
+            // 'All' sums every layer, an unknown genre has no row
+            var layer = genre === "All" ? -1 : cube.genres.indexOf(genre);
+            if (genre !== "All" && layer === -1) {
+                return counts;
+            }
+
+            for (var i = 0; i < cube.counts.length; i++) {
+                var year = cube.years[cube.yearPositions[i]];
+                if (year >= from_year && year <= to_year && (layer === -1 || cube.layers[i] === layer)) {
+                    counts[cube.dimPositions[i]] += cube.counts[i];
+                }
+            }
+
+            return counts;
+        },
+
+        // Same order as the sort of python strings, by character code
+        compare_keys: function(a, b) {
+            for (var i = 0; i < a.length; i++) {
+                if (a[i] < b[i]) {
+                    return -1;
+                }
+                if (a[i] > b[i]) {
+                    return 1;
+                }
+            }
+            return 0;
+        }
+    }
+});
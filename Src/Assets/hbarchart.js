@@ -0,0 +1,12 @@
+/*
+ * This file contains the clientside callbacks of the horizontal bar chart.
+ */
+
+window.dash_clientside = Object.assign({}, window.dash_clientside, {
+    hbarchart: {
+        // The years are only chosen for the "window" baseline
+        disable_range_slider: function(baseline) {
+            return baseline !== "window";
+        }
+    }
+});
@@ -0,0 +1,101 @@
+/*
+ * This file contains the clientside callbacks of the table.
+ * The counts are shipped once in the layout, the top n languages of a genre and years are aggregated in the browser.
+ */
+
+window.dash_clientside = Object.assign({}, window.dash_clientside, {
+    table: {
+        // Same title as table.create_table_title
+        create_title: function(table_title, slider_min_year, slider_max_year, ddm_genre) {
+            var title_str;
+            if (ddm_genre === "All") {
+                title_str = "INFOS COMPLÉMENTAIRES SUR LES FILMS PRODUITS ENTRE LES ANNÉES " +
+                    slider_min_year + " ET " + slider_max_year;
+            } else {
+                title_str = "INFOS COMPLÉMENTAIRES SUR LES FILMS \"" + ddm_genre +
+                    "\" PRODUITS ENTRE LES ANNÉES " + slider_min_year + " ET " + slider_max_year;
+            }
+
+            return Object.assign({}, table_title, {
+                props: Object.assign({}, table_title.props, {children: title_str})
+            });
+        },
+
+        // Same rounding as np.round, i.e. half to even
+        round_decimals: function(x, n_decimals) {
+            var y = x * Math.pow(10, n_decimals);
+            var floor = Math.floor(y);
+            var rounded = y - floor > 0.5 || (y - floor === 0.5 && floor % 2 !== 0) ? floor + 1 : floor;
+            return rounded / Math.pow(10, n_decimals);
+        },
+
+        // Same rows as table.query_top_n_for_table
+        query_top_n: function(table_cube, genre, from_year, to_year, top_n) {
+            var compare_keys = window.dash_clientside.count_cube.compare_keys;
+            var counts = window.dash_clientside.count_cube.query(table_cube, genre, from_year, to_year);
+            var by_count = function(a, b) { return b.nombreDeFilms - a.nombreDeFilms; };
+
+            // Languages found in the period, ties stay in the order of the languages
+            var rows = [];
+            for (var d = 0; d < counts.length; d++) {
+                if (counts[d] > 0) {
+                    rows.push({langue: table_cube.dims.langue[d], nombreDeFilms: counts[d]});
+                }
+            }
+            rows.sort(by_count);
+
+            // Aggregate the languages after the top n in "autres", sorted by language then by count
+            if (rows.length > top_n) {
+                var groups = {};
+                rows.forEach(function(row, i) {
+                    var langue = i < top_n ? row.langue : "autres";
+                    groups[langue] = (groups[langue] || 0) + row.nombreDeFilms;
+                });
+                rows = Object.keys(groups)
+                    .sort(function(a, b) { return compare_keys([a], [b]); })
+                    .map(function(langue) { return {langue: langue, nombreDeFilms: groups[langue]}; })
+                    .sort(by_count);
+            }
+
+            // Percentage of each language
+            var n_films = rows.reduce(function(total, row) { return total + row.nombreDeFilms; }, 0);
+            rows.forEach(function(row) {
+                row.pourcentageDeFilms = window.dash_clientside.table.round_decimals(100 * row.nombreDeFilms / n_films, 2);
+            });
+
+            return rows;
+        },
+
+        update_table_top_n: function(ddm_genre, rs_values, s_value, table_store) {
+            var top_n = s_value[0];
+            var rows = window.dash_clientside.table.query_top_n(
+                table_store.cube, ddm_genre, rs_values[0], rs_values[1], top_n
+            );
+
+            // Same cells as table.create_table_top_n_fig, floats are written as python does
+            var trace = Object.assign({}, table_store.figure.data[0], {
+                cells: Object.assign({}, table_store.figure.data[0].cells, {
+                    values: [
+                        rows.map(function(row) { return row.langue; }),
+                        rows.map(function(row) { return row.nombreDeFilms; }),
+                        rows.map(function(row) {
+                            var pourcentage = row.pourcentageDeFilms;
+                            return (Number.isInteger(pourcentage) ? pourcentage.toFixed(1) : String(pourcentage)) + " %";
+                        })
+                    ]
+                })
+            });
+            var figure = Object.assign({}, table_store.figure, {
+                data: [trace],
+                layout: Object.assign({}, table_store.figure.layout, {
+                    title: Object.assign({}, table_store.figure.layout.title, {text: "TOP " + top_n + ": Langues des productions"})
+                })
+            });
+            var title = window.dash_clientside.table.create_title(
+                table_store.title, rs_values[0], rs_values[1], ddm_genre
+            );
+
+            return [title, figure];
+        }
+    }
+});
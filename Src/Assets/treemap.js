@@ -0,0 +1,85 @@
+/*
+ * This file contains the clientside callbacks of the treemap.
+ * The counts are shipped once in the layout, a genre or years change is aggregated in the browser.
+ */
+
+window.dash_clientside = Object.assign({}, window.dash_clientside, {
+    treemap: {
+        // Same title as treemap.create_treemap_title
+        create_title: function(treemap_title, slider_min_year, slider_max_year, ddm_genre) {
+            var title_str;
+            if (ddm_genre === "All") {
+                title_str = "Nombre de films de tous genres produits entre les années " +
+                    slider_min_year + " et " + slider_max_year;
+            } else {
+                title_str = "Nombre de films du genre " + ddm_genre +
+                    " produit entre les années " + slider_min_year + " et " + slider_max_year;
+            }
+
+            return Object.assign({}, treemap_title, {
+                props: Object.assign({}, treemap_title.props, {children: title_str})
+            });
+        },
+
+        // Same trace as px.treemap with path=['planete', 'continent', 'pays'] and hover_name='pays'
+        create_trace: function(treemap_trace, dims, counts) {
+            var compare_keys = window.dash_clientside.count_cube.compare_keys;
+            var trace = Object.assign({}, treemap_trace, {ids: [], labels: [], parents: [], values: [], hovertext: []});
+
+            // Countries found in the period
+            var rows = [];
+            for (var d = 0; d < counts.length; d++) {
+                if (counts[d] > 0) {
+                    rows.push({planete: dims.planete[d], continent: dims.continent[d], pays: dims.pays[d], value: counts[d]});
+                }
+            }
+
+            // From the countries to the planet, each level is grouped and sorted by its path read backwards
+            var levels = [["pays", "continent", "planete"], ["continent", "planete"], ["planete"]];
+            levels.forEach(function(level) {
+                var groups = {};
+                rows.forEach(function(row) {
+                    var key = level.map(function(col_name) { return row[col_name]; });
+                    var group = groups[JSON.stringify(key)];
+                    if (group === undefined) {
+                        group = groups[JSON.stringify(key)] = {key: key, value: 0, pays: []};
+                    }
+                    group.value += row.value;
+                    if (group.pays.indexOf(row.pays) === -1) {
+                        group.pays.push(row.pays);
+                    }
+                });
+
+                Object.values(groups)
+                    .sort(function(a, b) { return compare_keys(a.key, b.key); })
+                    .forEach(function(group) {
+                        var path = group.key.slice().reverse();
+                        trace.ids.push(path.join("/"));
+                        trace.labels.push(group.key[0]);
+                        trace.parents.push(path.slice(0, -1).join("/"));
+                        trace.values.push(group.value);
+                        trace.hovertext.push(group.pays.length === 1 ? group.pays[0] : "(?)");
+                    });
+            });
+
+            return trace;
+        },
+
+        update_treemap: function(ddm_genre, rs_values, treemap_store) {
+            var counts = window.dash_clientside.count_cube.query(
+                treemap_store.cube, ddm_genre, rs_values[0], rs_values[1]
+            );
+            var trace = window.dash_clientside.treemap.create_trace(treemap_store.figure.data[0], treemap_store.cube.dims, counts);
+
+            // As px.treemap, a period without movies has no trace
+            var figure = Object.assign({}, treemap_store.figure, {
+                data: trace.ids.length > 0 ? [trace] : []
+            });
+            var title = window.dash_clientside.treemap.create_title(
+                treemap_store.title, rs_values[0], rs_values[1], ddm_genre
+            );
+
+            return [title, figure];
+        }
+    }
+});
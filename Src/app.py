@@ -4,13 +4,13 @@
 
 
 # External lib
+import os
 import dash
 import dash_html_components as html
 import dash_core_components as dcc
-from dash.dependencies import Input, Output, State
+from dash.dependencies import Input, Output, State, ClientsideFunction
 
 # Local lib
-import preprocess_vsHeroku
 import preprocess_vsBackEnd
 import preprocess_vsCommon
 import preprocess_vsSunburst
@@ -26,17 +26,36 @@ import barchart
 import hbarchart
 
 import callback
+import cache
 
 
 # Create app
 app = dash.Dash(__name__)
 app.title = 'INF8808 - Projet Cinematheque'
 
-# Preprocess
-preprocess_vsHeroku.create_data_files()
+# Filter the treemap and the table in the browser, set CLIENTSIDE_FILTERING=0 to filter them on the server
+clientside_filtering = os.environ.get('CLIENTSIDE_FILTERING', '1') != '0'
+
+# Serve the repeated callback requests from their encoded responses
+# Set FIGURE_STORE_PATH to share them between the workers and across restarts
+response_cache = cache.create_lru_cache(max_entries=1024, max_bytes=64*1024*1024)
+figure_store = None
+if os.environ.get('FIGURE_STORE_PATH'):
+    figure_store = cache.create_sqlite_store(
+        path=os.environ['FIGURE_STORE_PATH'],
+        version=cache.compute_store_version(
+            data_hash=preprocess_vsBackEnd.compute_preprocessed_files_hash(),
+            source_path=os.path.dirname(os.path.abspath(__file__))
+        ),
+        max_bytes=int(os.environ.get('FIGURE_STORE_MAX_BYTES', 256*1024*1024))
+    )
+response_input_keys = {'barchart-graph.clickData': callback.get_barchart_click_key}
+cache.cache_dash_responses(app=app, lru_cache=response_cache, store=figure_store, input_keys=response_input_keys)
+
+# Check the files built by preprocess_vsHeroku.py, the app never rebuilds them
+preprocess_vsBackEnd.check_preprocessed_files()
 
 # load data
-sunburst_df = preprocess_vsBackEnd.load_preprocessed_sunburst_file()
 treemap_df = preprocess_vsBackEnd.load_preprocessed_treemap_file()
 bumpchart_df = preprocess_vsBackEnd.load_preprocessed_bumpchart_file()
 table_df = preprocess_vsBackEnd.load_preprocessed_table_file()
@@ -44,6 +63,12 @@ distinction_df = preprocess_vsBackEnd.load_preprocessed_distinction_file()
 barchart_df = preprocess_vsBarChart.clean_distinction_df_for_barchart(distinction_df=distinction_df)
 h_barchart_df = preprocess_vsBackEnd.load_preprocessed_h_barchart_file()
 avg_df = preprocess_vsBackEnd.load_preprocessed_avg_file()
+h_barchart_decade_df = preprocess_vsBackEnd.load_preprocessed_h_barchart_decade_file()
+
+# Count the movies once, the callbacks query the counts
+treemap_cube = treemap.create_treemap_count_cube(df=treemap_df)
+table_cube = table.create_table_count_cube(df=table_df)
+table_year_index = table.create_table_year_index(df=table_df)
 
 # Sunburst
 sunburst = sunburst.create_sunburst()
@@ -51,21 +76,24 @@ sunburst = sunburst.create_sunburst()
 # Treemap
 year_min, year_max = preprocess_vsCommon.get_min_and_max_year(df=treemap_df)
 genres = preprocess_vsCommon.get_list_of_genres(df=treemap_df)
-treemap_fig = treemap.create_treemap_fig(df=treemap_df, year_min=year_min, year_max=year_max)
+treemap_fig = treemap.create_treemap_fig(treemap_cube=treemap_cube, year_min=year_min, year_max=year_max)
 treemap_title = treemap.create_treemap_title(year_min_displayed=year_min, year_max_displayed=year_max, genre_displayed="All")
 treemap_graph = treemap.create_treemap_graph(treemap_fig=treemap_fig)
 treemap_ddm = treemap.create_treemap_dropdown_menu(genres=genres)
 treemap_rs = treemap.create_treemap_range_slider(year_min=year_min, year_max=year_max)
-treemap = treemap.create_treemap(treemap_title=treemap_title, treemap_rs=treemap_rs, treemap_ddm=treemap_ddm, treemap_graph=treemap_graph)
+treemap_store = treemap.create_treemap_store(treemap_cube=treemap_cube, treemap_fig=treemap_fig, treemap_title=treemap_title) if clientside_filtering else None
+treemap = treemap.create_treemap(treemap_title=treemap_title, treemap_rs=treemap_rs, treemap_ddm=treemap_ddm, treemap_graph=treemap_graph, treemap_store=treemap_store)
 
 # Bump Chart
 genres = preprocess_vsCommon.get_list_of_genres(df=bumpchart_df)
 bumpchart_ddm = bumpchart.create_bumpchart_dropdown_menu(genres=genres)
 bumpchart_fig = bumpchart.create_bumpchart_fig(bumpchart_df=bumpchart_df)
 bumpchart_graph = bumpchart.create_bumpchart_graph(bumpchart_fig=bumpchart_fig)
+bumpchart_store = bumpchart.create_bumpchart_store(bumpchart_fig=bumpchart_fig)
 bumpchart = bumpchart.create_bumpchart(
     bumpchart_ddm=bumpchart_ddm, 
-    bumpchart_graph=bumpchart_graph
+    bumpchart_graph=bumpchart_graph,
+    bumpchart_store=bumpchart_store
 )
 
 # Table
@@ -73,16 +101,18 @@ top_n = 5
 year_min, year_max = preprocess_vsCommon.get_min_and_max_year(df=table_df)
 table_range_slider = table.create_table_range_slider(year_min=year_min, year_max=year_max)
 table_title = table.create_table_title(year_min_displayed=year_min, year_max_displayed=year_max, genre_displayed="All", top_n=top_n)
-top_n_df, oldest_df, latest_df = table.query_data_for_table(table_df=table_df, genre="All", from_year=year_min, to_year=year_max, top_n=top_n)
+top_n_df, oldest_df, latest_df = table.query_data_for_table(table_df=table_df, table_cube=table_cube, table_year_index=table_year_index, genre="All", from_year=year_min, to_year=year_max, top_n=top_n)
 table_top_n_fig, table_oldest_fig, table_latest_fig = table.create_table_fig(top_n_df=top_n_df, oldest_df=oldest_df, latest_df=latest_df, top_n=top_n)
 table_top_n_graph = table.create_table_top_n_graph(table_top_n_fig=table_top_n_fig)
 table_latest_graph = table.create_table_latest_graph(table_latest_fig=table_latest_fig)
 table_oldest_graph = table.create_table_oldest_graph(table_oldest_fig=table_oldest_fig)
 table_slider = table.create_table_slider(initial_value=top_n)
+table_store = table.create_table_store(table_cube=table_cube, table_top_n_fig=table_top_n_fig, table_title=table_title) if clientside_filtering else None
               
 # Bar Chart
 barchart_fig = barchart.create_barchart_fig(barchart_df=barchart_df)
 barchart_graph = barchart.create_barchart_graph(barchart_fig=barchart_fig)
+distinction_index = barchart.create_distinction_index(distinction_df=distinction_df)
 barchart_table_fig = barchart.create_empty_table_fig(distinction_df=distinction_df)
 barchart_table_graph = barchart.create_barchart_table_graph(barchart_table_fig=barchart_table_fig)
 barchart = barchart.create_barchart(
@@ -91,10 +121,20 @@ barchart = barchart.create_barchart(
 )
 
 # Horizontal Bar Chart
-h_barchart_ddm = hbarchart.create_h_barchart_dropdown_menu(h_barchart_df=h_barchart_df)
-h_barchart_fig = hbarchart.create_h_barchart_fig(producer="Étienne Desrosiers", h_barchart_df=h_barchart_df, avg_df=avg_df)
+producer_index = hbarchart.create_producer_index(h_barchart_df=h_barchart_df)
+h_barchart_ddm = hbarchart.create_h_barchart_dropdown_menu(producer="Étienne Desrosiers")
+h_barchart_matrix = hbarchart.create_h_barchart_matrix(h_barchart_df=h_barchart_df, avg_df=avg_df)
+# The baselines by period need p_h_barchart_decade.feather, they are hidden until it is built
+h_barchart_tensor = None
+h_barchart_ri = None
+h_barchart_rs = None
+if h_barchart_decade_df is not None:
+    h_barchart_tensor = hbarchart.create_h_barchart_tensor(h_barchart_decade_df=h_barchart_decade_df, h_barchart_matrix=h_barchart_matrix)
+    h_barchart_ri = hbarchart.create_h_barchart_baseline_radio_items()
+    h_barchart_rs = hbarchart.create_h_barchart_range_slider(h_barchart_tensor=h_barchart_tensor)
+h_barchart_fig = hbarchart.create_h_barchart_fig(producer="Étienne Desrosiers", h_barchart_matrix=h_barchart_matrix)
 h_barchart_graph = hbarchart.create_h_barchart_graph(h_barchart_fig=h_barchart_fig)
-h_barchart = hbarchart.create_h_barchart(h_barchart_graph=h_barchart_graph, h_barchart_ddm=h_barchart_ddm)
+h_barchart = hbarchart.create_h_barchart(h_barchart_graph=h_barchart_graph, h_barchart_ddm=h_barchart_ddm, h_barchart_ri=h_barchart_ri, h_barchart_rs=h_barchart_rs)
 
 # Create dashboard
 app.layout = html.Div(children=[
@@ -174,7 +214,7 @@ app.layout = html.Div(children=[
                         table_range_slider,
                         html.P('Sélectionner le TOP N des langues les plus utilisées', className='table-option-title'),
                         table_slider,
-                ]),
+                ] + ([table_store] if table_store is not None else [])),
             ]),
 
             html.Div(className='table-container',children=[
@@ -264,58 +304,150 @@ app.layout = html.Div(children=[
     ],className='footer'),
 
 ])
-# Set callbacks
-@app.callback([
-               Output(component_id='treemap-title', component_property='children'),
-               Output(component_id='treemap-graph', component_property='figure'),
-               Output(component_id='bumpchart-graph', component_property='figure'),
-               Output(component_id='table-title', component_property='children'),
-               Output(component_id='table-top-n-graph', component_property='figure'),
-               Output(component_id='table-latest-graph', component_property='figure'),
-               Output(component_id='table-oldest-graph', component_property='figure'),
-               Output(component_id='barchart-table-graph', component_property='figure'),
-               Output(component_id='h-barchart-graph', component_property='figure')],
-              [Input(component_id='treemap-dropdown-menu', component_property='value'),
-               Input(component_id='treemap-range-slider', component_property='value'),
-               Input(component_id='bumpchart-dropdown-menu', component_property='value'),
-               Input(component_id='table-range-slider', component_property='value'),
-               Input(component_id='table-slider', component_property='value'),     
-               Input(component_id='barchart-graph', component_property='clickData'),
-               Input(component_id='hbarchart-dropdown-menu', component_property='value')])
-def update_viz(treemap_ddm_value, treemap_rs_values, bumpchart_ddm_value, table_rs_values, table_s_value, barchart_click,hbarchart_ddm_value):     
-    # Sunburst
-    # No callback
-
-    # Treemap 
-    treemap_title, treemap_fig = callback.callback_treemap(
-        treemap_df=treemap_df,
-        slider_min_year=treemap_rs_values[0], 
-        slider_max_year=treemap_rs_values[1], 
-        ddm_genre=treemap_ddm_value
-    )
+# Set callbacks, each visualization only listens to its own inputs
+# Sunburst
+# No callback
 
-    # Bumpchart
-    bumpchart_fig = callback.callback_bumpchart(
-        bumpchart_df=bumpchart_df, 
-        ddm_genre=bumpchart_ddm_value
+# Treemap
+if clientside_filtering:
+    app.clientside_callback(
+        ClientsideFunction(namespace='treemap', function_name='update_treemap'),
+        [Output(component_id='treemap-title', component_property='children'),
+         Output(component_id='treemap-graph', component_property='figure')],
+        [Input(component_id='treemap-dropdown-menu', component_property='value'),
+         Input(component_id='treemap-range-slider', component_property='value')],
+        [State(component_id='treemap-store', component_property='data')]
     )
+else:
+    @app.callback([
+                   Output(component_id='treemap-title', component_property='children'),
+                   Output(component_id='treemap-graph', component_property='figure')],
+                  [Input(component_id='treemap-dropdown-menu', component_property='value'),
+                   Input(component_id='treemap-range-slider', component_property='value')])
+    def update_treemap(treemap_ddm_value, treemap_rs_values):
+        treemap_title, treemap_fig = callback.callback_treemap(
+            treemap_cube=treemap_cube,
+            slider_min_year=treemap_rs_values[0], 
+            slider_max_year=treemap_rs_values[1], 
+            ddm_genre=treemap_ddm_value
+        )
+
+        return treemap_title, treemap_fig
+
+
+# Bumpchart, the base figure is only restyled, in the browser
+app.clientside_callback(
+    ClientsideFunction(namespace='bumpchart', function_name='highlight_genre'),
+    Output(component_id='bumpchart-graph', component_property='figure'),
+    [Input(component_id='bumpchart-dropdown-menu', component_property='value')],
+    [State(component_id='bumpchart-store', component_property='data')]
+)
+
 
-    # Table
-    table_title, table_top_n_fig, table_latest_fig, table_oldest_fig = callback.callback_table(
-        table_df=table_df,
-        slider_min_year=table_rs_values[0], 
-        slider_max_year=table_rs_values[1], 
-        ddm_genre=bumpchart_ddm_value,
-        top_n=table_s_value[0] 
+# Table, it follows the genre selected on the bumpchart
+if clientside_filtering:
+    # The top n languages are computed in the browser, the oldest and latest movies need the whole table
+    app.clientside_callback(
+        ClientsideFunction(namespace='table', function_name='update_table_top_n'),
+        [Output(component_id='table-title', component_property='children'),
+         Output(component_id='table-top-n-graph', component_property='figure')],
+        [Input(component_id='bumpchart-dropdown-menu', component_property='value'),
+         Input(component_id='table-range-slider', component_property='value'),
+         Input(component_id='table-slider', component_property='value')],
+        [State(component_id='table-store', component_property='data')]
     )
 
-    # Barchart
+    @app.callback([
+                   Output(component_id='table-latest-graph', component_property='figure'),
+                   Output(component_id='table-oldest-graph', component_property='figure')],
+                  [Input(component_id='bumpchart-dropdown-menu', component_property='value'),
+                   Input(component_id='table-range-slider', component_property='value')])
+    def update_table_oldest_and_latest(bumpchart_ddm_value, table_rs_values):
+        table_latest_fig, table_oldest_fig = callback.callback_table_oldest_and_latest(
+            table_df=table_df,
+            table_year_index=table_year_index,
+            slider_min_year=table_rs_values[0], 
+            slider_max_year=table_rs_values[1], 
+            ddm_genre=bumpchart_ddm_value
+        )
+
+        return table_latest_fig, table_oldest_fig
+else:
+    @app.callback([
+                   Output(component_id='table-title', component_property='children'),
+                   Output(component_id='table-top-n-graph', component_property='figure'),
+                   Output(component_id='table-latest-graph', component_property='figure'),
+                   Output(component_id='table-oldest-graph', component_property='figure')],
+                  [Input(component_id='bumpchart-dropdown-menu', component_property='value'),
+                   Input(component_id='table-range-slider', component_property='value'),
+                   Input(component_id='table-slider', component_property='value')])
+    def update_table(bumpchart_ddm_value, table_rs_values, table_s_value):
+        table_title, table_top_n_fig, table_latest_fig, table_oldest_fig = callback.callback_table(
+            table_df=table_df,
+            table_cube=table_cube,
+            table_year_index=table_year_index,
+            slider_min_year=table_rs_values[0], 
+            slider_max_year=table_rs_values[1], 
+            ddm_genre=bumpchart_ddm_value,
+            top_n=table_s_value[0] 
+        )
+
+        return table_title, table_top_n_fig, table_latest_fig, table_oldest_fig
+
+
+# Barchart
+@app.callback(Output(component_id='barchart-table-graph', component_property='figure'),
+              [Input(component_id='barchart-graph', component_property='clickData')])
+def update_barchart(barchart_click):
     barchart_table_fig = callback.callback_barchart(
         distinction_df=distinction_df, 
+        distinction_index=distinction_index,
         barchart_click=barchart_click
     )
 
-    # Horizontal bar chart
-    hbarchart_fig = callback.callback_hbarchart(hbarchart_ddm_value, h_barchart_df, avg_df)
-    
-    return treemap_title, treemap_fig, bumpchart_fig, table_title, table_top_n_fig, table_latest_fig, table_oldest_fig, barchart_table_fig, hbarchart_fig
\ No newline at end of file
+    return barchart_table_fig
+
+
+# Horizontal bar chart
+if h_barchart_tensor is not None:
+    @app.callback(Output(component_id='h-barchart-graph', component_property='figure'),
+                  [Input(component_id='hbarchart-dropdown-menu', component_property='value'),
+                   Input(component_id='hbarchart-baseline-radio-items', component_property='value'),
+                   Input(component_id='hbarchart-range-slider', component_property='value')])
+    def update_h_barchart(hbarchart_ddm_value, hbarchart_ri_value, hbarchart_rs_values):
+        hbarchart_fig = callback.callback_hbarchart(
+            hbarchart_ddm_value, 
+            h_barchart_matrix, 
+            h_barchart_tensor, 
+            hbarchart_ri_value, 
+            hbarchart_rs_values[0], 
+            hbarchart_rs_values[1]
+        )
+
+        return hbarchart_fig
+
+
+    # Horizontal bar chart, the years are only chosen for the "window" baseline
+    app.clientside_callback(
+        ClientsideFunction(namespace='hbarchart', function_name='disable_range_slider'),
+        Output(component_id='hbarchart-range-slider', component_property='disabled'),
+        [Input(component_id='hbarchart-baseline-radio-items', component_property='value')]
+    )
+else:
+    # Baseline of all the years only
+    @app.callback(Output(component_id='h-barchart-graph', component_property='figure'),
+                  [Input(component_id='hbarchart-dropdown-menu', component_property='value')])
+    def update_h_barchart(hbarchart_ddm_value):
+        hbarchart_fig = callback.callback_hbarchart(hbarchart_ddm_value, h_barchart_matrix)
+
+        return hbarchart_fig
+
+
+# Horizontal bar chart, options of the producers searched
+@app.callback(Output(component_id='hbarchart-dropdown-menu', component_property='options'),
+              [Input(component_id='hbarchart-dropdown-menu', component_property='search_value')],
+              [State(component_id='hbarchart-dropdown-menu', component_property='value')])
+def update_h_barchart_options(hbarchart_ddm_search_value, hbarchart_ddm_value):
+    options = callback.callback_hbarchart_options(producer_index, hbarchart_ddm_search_value, hbarchart_ddm_value)
+
+    return options
@@ -11,10 +11,8 @@ import dash
 import dash_html_components as html
 import dash_core_components as dcc
 
-import plotly.graph_objects as go
-
 # Internal lib
-# none
+import figure_dict
 
 
 def compute_plot_marker_height(barchart_df):
@@ -55,42 +53,42 @@ def create_barchart_fig(barchart_df):
     max_height = height_df.max()
 
     # Plot results
-    fig = go.Figure(
-            go.Scatter(
-                mode = 'markers',
-                marker_symbol = "square", 
-                marker_size = 10,
-                marker_color = "#81B4E3",
-                marker_line_width = 2,
-                marker_line_color = "black",
-                x = barchart_df,
-                y = height_df,
-                hovertemplate = (
-                    '<br><b>Personne </b>: %{text}<br>'+
-                    '<b>Distinctions </b> : %{x}  <extra></extra>'
-                ),
-                text = barchart_df.index,
-                showlegend = False 
-                ),
-            go.Layout(
-                title_text = "Distribution des nombres de distinctions",
-                title_x = 0.5,
+    fig = figure_dict.create_figure(
+            data=[
+                dict(
+                    type='scatter',
+                    mode = 'markers',
+                    marker = dict(
+                        symbol = "square", 
+                        size = 10,
+                        color = "#81B4E3",
+                        line = dict(width = 2, color = "black"),
+                    ),
+                    x = barchart_df,
+                    y = height_df,
+                    hovertemplate = (
+                        '<br><b>Personne </b>: %{text}<br>'+
+                        '<b>Distinctions </b> : %{x}  <extra></extra>'
+                    ),
+                    text = barchart_df.index,
+                    showlegend = False 
+                    )
+                ],
+            layout=dict(
+                title = dict(text = "Distribution des nombres de distinctions", x = 0.5),
                 height=600,
                 margin=dict(l=0,r=10),
+                xaxis = dict(
+                    range=[min_count - 1, max_count + 1], 
+                    dtick = 1, 
+                    title = dict(text = "Nombre de distinctions"),
+                ),
+                yaxis = dict(range=[-1, max_height + 1]),
+                paper_bgcolor='rgba(0,0,0,0)',
+                font=dict(family="Helvetica", color="#3B3838"),
                 )
             )       
 
-    # Adjust layout
-    fig.update_layout(
-        xaxis_range=[min_count - 1, max_count + 1], 
-        xaxis_dtick = 1, 
-        xaxis_title = "Nombre de distinctions",
-        yaxis_range=[-1, max_height + 1],
-        paper_bgcolor='rgba(0,0,0,0)',
-        font_family="Helvetica",
-        font_color="#3B3838",
-    )
-
     return fig
 
 
@@ -112,56 +110,119 @@ def create_barchart_graph(barchart_fig):
 
 
 def create_empty_table_fig(distinction_df):
-    fig = go.Figure(
+    fig = figure_dict.create_figure(
         data=[
-            go.Table(
+            dict(
+                type='table',
                 columnwidth = [300,50],
-                header_values=["<b>Distinction</b>", "<b>Année</b>"],
-                header_fill_color="#81B4E3",
-                header_align='center',
+                header = dict(
+                    values=["<b>Distinction</b>", "<b>Année</b>"],
+                    fill=dict(color="#81B4E3"),
+                    align='center',
+                ),
             ),
         ],
-        layout=go.Layout(
+        layout=dict(
             height=600,
             width=450,
             margin=dict(l=5,r=0),
             paper_bgcolor='rgba(0,0,0,0)',
             plot_bgcolor='rgba(0,0,0,0)',
-            font_family="Helvetica",
-            font_color="#3B3838",
+            font=dict(family="Helvetica", color="#3B3838"),
         )
     )
                 
     return fig
 
-
 def create_link(lienWiki,distinctionLabel):
     return '<a href="'+ lienWiki +'">' + distinctionLabel.title() + '</a>'
 
 
-def create_filled_table_fig(distinction_df, name):
-    # Get data for the selecteur person
-    one_actor = distinction_df[distinction_df['nomComplet']==name].sort_values("date", ascending=True)
-    one_actor["linkToWiki"] = one_actor.apply(lambda x: create_link(x['lienWikidata'], x['distinction']), axis=1)
+def create_distinction_index(distinction_df):
+    """
+    Creates the index of the distinctions of each person, used to fill the table of the
+    barchart without filtering distinction_df on every click.
+
+    Parameters
+    ----------
+    distinction_df : pd.DataFrame()
+        The preprocessed distinctions, one row per person and distinction
+
+    Raises
+    ------
+    -
+
+    Returns
+    -------
+    distinction_index : pd.Series()
+        For each person, the links of its distinctions, see create_link, and their years,
+        sorted by date with the distinctions without date last
+
+    Sources
+    -------
+    -
+
+    See Also
+    --------
+    create_filled_table_fig
+    """
+
+    # Sort once by person then by date, the distinctions of a person are contiguous
+    temp_df = distinction_df.astype({'nomComplet': 'object'}).sort_values(
+        by=['nomComplet', 'date'],
+        kind='mergesort',
+        na_position='last'
+    )
+
+    # No distinction, no person to index
+    if temp_df.empty:
+        return pd.Series(dtype='object')
+
+    # Links and years of all the distinctions, a missing year is written as null
+    links = np.array([
+        create_link(lienWiki, distinctionLabel)
+        for lienWiki, distinctionLabel in zip(temp_df['lienWikidata'], temp_df['distinction'].astype('object'))
+    ], dtype='object')
+    years = temp_df['annee'].astype('object').where(temp_df['annee'].notna(), None).to_numpy()
+
+    # Slices of each person
+    names = temp_df['nomComplet'].to_numpy()
+    starts = np.flatnonzero(np.r_[True, names[1:] != names[:-1]])
+    ends = np.r_[starts[1:], len(names)]
+    distinction_index = pd.Series(
+        [(links[start:end], years[start:end]) for start, end in zip(starts, ends)],
+        index=names[starts],
+        dtype='object'
+    )
+
+    return distinction_index
+
+
+def create_filled_table_fig(distinction_index, name):
+    # Get data for the selecteur person, none for an unknown person
+    links, years = distinction_index.get(name, ([], []))
     
     # Create fig
-    fig = go.Figure(    
+    fig = figure_dict.create_figure(    
         data=[
-            go.Table(
+            dict(
+                type='table',
                 columnwidth = [300,50],
-                header_values=["<b>Distinction</b>", "<b>Année</b>"],
-                header_fill_color="#81B4E3",
-                header_align='center',
-                cells_values=[one_actor["linkToWiki"], one_actor["annee"]],
-                cells_fill_color='#E5ECF6',
-                cells_align=['left','center']
+                header = dict(
+                    values=["<b>Distinction</b>", "<b>Année</b>"],
+                    fill=dict(color="#81B4E3"),
+                    align='center',
+                ),
+                cells = dict(
+                    values=[links, years],
+                    fill=dict(color='#E5ECF6'),
+                    align=['left','center'],
+                ),
             )
         ],
-        layout=go.Layout(
-            title_text = f"Distinctions de {name}",
-            title_x = 0.5,
-            font_family="Helvetica",
-            font_color="#3B3838",
+        layout=dict(
+            title = dict(text = f"Distinctions de {name}", x = 0.5),
+            font=dict(family="Helvetica", color="#3B3838"),
             height=600,
             width=450,
             margin=dict(l=0,r=0),
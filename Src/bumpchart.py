@@ -13,10 +13,10 @@ import dash
 import dash_html_components as html
 import dash_core_components as dcc
 import plotly.express as px
-import plotly.graph_objects as go
 
 # Internal lib
 import preprocess_vsBumpChart
+import figure_dict
 
 
 def create_bumpchart_dropdown_menu(genres):
@@ -38,9 +38,6 @@ def create_bumpchart_dropdown_menu(genres):
 
 def create_bumpchart_fig(bumpchart_df):
 
-    # Create raw fig
-    fig = go.Figure()
-
     # Set lists
     x_data = bumpchart_df["decennie"]
     y_data = bumpchart_df["rang"]
@@ -52,28 +49,30 @@ def create_bumpchart_fig(bumpchart_df):
     temporary_theme = px.colors.sequential.dense[2:] + list(reversed(px.colors.sequential.RdPu))[:-2]
 
     # Add traces
+    data = []
     for idx, genre in enumerate(genres):
-        fig.add_trace(
-            go.Scatter(
+        data.append(
+            dict(
+                type='scatter',
                 x=x_data[genreCat==str(genre)],
                 y=y_data[genreCat==str(genre)],
                 name=genre,
                 mode='lines+markers',
                 text=bumpchart_df['compte'][genreCat==str(genre)],
                 hovertemplate="<b>%{text} production(s)</b>",
-                marker_color= temporary_theme[idx],
+                marker=dict(color=temporary_theme[idx]),
                 yaxis="y",
             )
         )
     
-    x_bg = np.repeat([*range(1910, 2019, 10), 2019],max(y_data))
+    x_bg = np.repeat(np.sort(x_data.unique()),max(y_data))
     y_bg = [*range(1,max(y_data)+1,1)]*max(y_data)
-    fig.add_trace(go.Scatter(
+    data.append(dict(
+        type='scatter',
         x=x_bg,
         y=y_bg,
         mode='markers',
-        marker_symbol='square',
-        marker_color="lightgrey",
+        marker=dict(symbol='square', color="lightgrey"),
         yaxis="y2",
         hoverinfo='none',
         ))
@@ -85,54 +84,59 @@ def create_bumpchart_fig(bumpchart_df):
     rank_range_descending = [max(bumpchart_df["rang"])+1, 0]
     rank_range_ascending = [*range(min(y_data),max(y_data)+1,1)]
 
-    fig = go.Figure(fig)
-        
-    fig.update_layout(
-        hovermode='x',
-        margin=dict(t=25),
-        dragmode=False,
-        hoverlabel=dict(
-            bgcolor= 'white',
-        ),
-        xaxis=dict(
-            title="Année de production",
-            tickmode = 'array',
-            tickvals= x_data,
-            ticktext= x_data,
-            tickangle = -45,
-            fixedrange=True,
-            scaleratio = 4,
-        ),
-        yaxis=dict(
-            range=rank_range_descending,
-            tickmode="array",
-            tickvals= y_data[x_data == max(x_data)],
-            ticktext= y_genre[x_data == max(x_data)],
-            showgrid= False,
-            anchor="x",
-            overlaying="y2",
-            side="right",
-            scaleratio = 4,
-            position=0.15
+    # Change grid color and axis colors
+    axis_style = dict(showline=True, linewidth=2, linecolor='black')
+
+    fig = figure_dict.create_figure(
+        data=data,
+        layout=dict(
+            hovermode='x',
+            margin=dict(t=25),
+            dragmode=False,
+            hoverlabel=dict(
+                bgcolor= 'white',
             ),
-        yaxis2=dict(
-            title="Rang",
-            range=rank_range_descending,
-            tickmode="array",
-            tickvals= rank_range_ascending,
-            ticktext= rank_range_ascending,
-            anchor="x",
-            side="left",
-            constrain='domain',
-            position=0.15
+            xaxis=dict(
+                title=dict(text="Année de production"),
+                tickmode = 'array',
+                tickvals= x_data,
+                ticktext= x_data,
+                tickangle = -45,
+                fixedrange=True,
+                scaleratio = 4,
+                gridcolor='grey',
+                **axis_style
             ),
-        showlegend=False,
-        paper_bgcolor='rgba(0,0,0,0)',
-        plot_bgcolor='white',
+            yaxis=dict(
+                range=rank_range_descending,
+                tickmode="array",
+                tickvals= y_data[x_data == max(x_data)],
+                ticktext= y_genre[x_data == max(x_data)],
+                showgrid= False,
+                anchor="x",
+                overlaying="y2",
+                side="right",
+                scaleratio = 4,
+                position=0.15,
+                **axis_style
+                ),
+            yaxis2=dict(
+                title=dict(text="Rang"),
+                range=rank_range_descending,
+                tickmode="array",
+                tickvals= rank_range_ascending,
+                ticktext= rank_range_ascending,
+                anchor="x",
+                side="left",
+                constrain='domain',
+                position=0.15,
+                **axis_style
+                ),
+            showlegend=False,
+            paper_bgcolor='rgba(0,0,0,0)',
+            plot_bgcolor='white',
+        )
     )
-    # Change grid color and axis colors
-    fig.update_xaxes(showline=True, linewidth=2, linecolor='black', gridcolor='grey')
-    fig.update_yaxes(showline=True, linewidth=2, linecolor='black')
     
     return fig
 
@@ -153,7 +157,17 @@ def create_bumpchart_graph(bumpchart_fig):
     return bumpchart_graph
 
 
-def create_bumpchart(bumpchart_ddm, bumpchart_graph):  # bumpchart_title
+def create_bumpchart_store(bumpchart_fig):
+    # Base figure, restyled in the browser when a genre is selected, see Assets/bumpchart.js
+    bumpchart_store = dcc.Store(
+        id='bumpchart-store',
+        data=bumpchart_fig,
+    )
+
+    return bumpchart_store
+
+
+def create_bumpchart(bumpchart_ddm, bumpchart_graph, bumpchart_store):  # bumpchart_title
     
     bumpchart = html.Div(
         style={'width':'600px'}, 
@@ -161,6 +175,7 @@ def create_bumpchart(bumpchart_ddm, bumpchart_graph):  # bumpchart_title
             #bumpchart_title,
             bumpchart_ddm,
             bumpchart_graph,
+            bumpchart_store,
         ]   
     )
 
@@ -0,0 +1,456 @@
+#
+# This file contains the functions used to cache the results of the callbacks.
+#
+
+
+# External lib
+import collections
+import functools
+import glob
+import hashlib
+import inspect
+import json
+import os
+import sqlite3
+import threading
+import time
+
+import flask
+import numpy as np
+import plotly
+
+
+# Local lib
+# none
+
+
+def create_lru_cache(max_entries=256, max_bytes=64*1024*1024):
+    """
+    Creates an empty least recently used cache.
+
+    The cache is bounded by its number of entries and, if max_bytes is given, by the size of its
+    values, measured as the length of their JSON serialization, i.e. what Dash sends to the
+    browser, or as their length if they are already encoded bytes. When one of the bounds is
+    exceeded, the least recently used entries are evicted. Values that are not encoded yet, such
+    as figures, are better bounded by their number only, measuring them costs a serialization.
+
+    Parameters
+    ----------
+    max_entries : int
+        The maximal number of entries kept in the cache
+
+    max_bytes : int
+        The maximal total size of the values kept in the cache, in bytes, or None to bound the
+        cache by its number of entries only
+
+    Raises
+    ------
+    -
+
+    Returns
+    -------
+    lru_cache : dict()
+        The cache, to be used with memoize
+
+    Sources
+    -------
+    -
+
+    See Also
+    --------
+    memoize
+    cache_dash_responses
+    get_lru_cache_stats
+    """
+
+    lru_cache = {
+        'entries': collections.OrderedDict(),
+        'lock': threading.Lock(),
+        'max_entries': max_entries,
+        'max_bytes': max_bytes,
+        'size_bytes': 0,
+        'hits': 0,
+        'misses': 0,
+    }
+
+    return lru_cache
+
+
+def normalize_cache_key_value(value):
+    # Containers are compared by content, in a hashable form
+    if isinstance(value, dict):
+        return tuple(sorted((key, normalize_cache_key_value(item)) for key, item in value.items()))
+    if isinstance(value, (list, tuple)):
+        return tuple(normalize_cache_key_value(item) for item in value)
+    if isinstance(value, np.generic):
+        value = value.item()
+
+    # The browser sends 1901.0 as 1901
+    if isinstance(value, float) and value.is_integer():
+        return int(value)
+
+    # Data loaded once at startup (dataframes, cubes, indexes) is compared by identity
+    try:
+        hash(value)
+    except TypeError:
+        return ('id', id(value))
+
+    return value
+
+
+def create_cache_key(function, args, kwargs):
+    # Positional and keyword calls of the same arguments share their key
+    bound_arguments = inspect.signature(function).bind(*args, **kwargs)
+    bound_arguments.apply_defaults()
+
+    return (function.__qualname__, normalize_cache_key_value(bound_arguments.arguments))
+
+
+def get_value_size(value):
+    if isinstance(value, bytes):
+        return len(value)
+
+    return len(json.dumps(value, cls=plotly.utils.PlotlyJSONEncoder))
+
+
+def get_cached_value(lru_cache, key):
+    with lru_cache['lock']:
+        entries = lru_cache['entries']
+        if key not in entries:
+            lru_cache['misses'] += 1
+            return False, None
+
+        # Mark the entry as the most recently used
+        entries.move_to_end(key)
+        lru_cache['hits'] += 1
+
+        return True, entries[key][0]
+
+
+def set_cached_value(lru_cache, key, value):
+    # Values are only measured if the cache is bounded by their size
+    size = 0 if lru_cache['max_bytes'] is None else get_value_size(value)
+
+    with lru_cache['lock']:
+        # A value larger than the whole cache is never kept
+        if lru_cache['max_bytes'] is not None and size > lru_cache['max_bytes']:
+            return
+
+        # Another thread may have computed the same entry meanwhile
+        entries = lru_cache['entries']
+        if key in entries:
+            lru_cache['size_bytes'] -= entries.pop(key)[1]
+        entries[key] = (value, size)
+        lru_cache['size_bytes'] += size
+
+        # Evict the least recently used entries
+        while len(entries) > lru_cache['max_entries'] or (
+                lru_cache['max_bytes'] is not None and lru_cache['size_bytes'] > lru_cache['max_bytes']):
+            _, (_, evicted_size) = entries.popitem(last=False)
+            lru_cache['size_bytes'] -= evicted_size
+
+    return
+
+
+def memoize(lru_cache):
+    """
+    Caches the results of a pure function in an LRU cache.
+
+    The key is built from the function name and all its arguments. Dicts, lists and tuples are
+    compared by content, and unhashable objects, such as the dataframes loaded at startup, by
+    identity. The cache is safe to share between the threads of the Flask server, the function
+    itself is called outside of the lock.
+
+    Parameters
+    ----------
+    lru_cache : dict()
+        The cache, see create_lru_cache
+
+    Raises
+    ------
+    -
+
+    Returns
+    -------
+    decorator : function()
+        The decorator to apply to the function
+
+    Sources
+    -------
+    -
+
+    See Also
+    --------
+    create_lru_cache
+    """
+
+    def decorator(function):
+        @functools.wraps(function)
+        def wrapper(*args, **kwargs):
+            key = create_cache_key(function=function, args=args, kwargs=kwargs)
+            found, value = get_cached_value(lru_cache=lru_cache, key=key)
+            if not found:
+                value = function(*args, **kwargs)
+                set_cached_value(lru_cache=lru_cache, key=key, value=value)
+
+            return value
+
+        return wrapper
+
+    return decorator
+
+
+def compute_store_version(data_hash, source_path):
+    # Stored figures depend on the preprocessed files and on the code that draws them
+    sha256 = hashlib.sha256(data_hash.encode('utf-8'))
+    for file_path in sorted(glob.glob(os.path.join(source_path, "*.py"))):
+        with open(file_path, 'rb') as file:
+            sha256.update(file.read())
+
+    return sha256.hexdigest()
+
+
+def create_sqlite_store(path, version, max_bytes=256*1024*1024, touch_interval=60):
+    """
+    Creates a persistent store for encoded responses, in a SQLite database.
+
+    The database can be shared by the worker processes of the server and outlives them, so that
+    a restart comes up warm. Entries are namespaced by version, the entries of other versions
+    are dropped when the store is created, and the least recently used entries are evicted when
+    the total size of the stored values exceeds max_bytes. Pinned entries, i.e. the ones
+    rendered ahead of time, are never evicted. A hit only writes its access time if it is older
+    than touch_interval, so that the reads of the workers do not queue on the single writer.
+
+    Parameters
+    ----------
+    path : str()
+        The path of the SQLite database, created if missing
+
+    version : str()
+        The version of the stored values, see compute_store_version
+
+    max_bytes : int
+        The maximal total size of the values kept in the store, in bytes
+
+    touch_interval : float
+        The delay after which a hit refreshes the access time of its entry, in seconds
+
+    Raises
+    ------
+    -
+
+    Returns
+    -------
+    store : dict()
+        The store, to be used with cache_dash_responses
+
+    Sources
+    -------
+    https://www.sqlite.org/wal.html
+
+    See Also
+    --------
+    compute_store_version
+    cache_dash_responses
+    """
+
+    store = {
+        'path': path,
+        'version': version,
+        'max_bytes': max_bytes,
+        'touch_interval': touch_interval,
+        'local': threading.local(),
+    }
+
+    # WAL lets the readers of all the workers run alongside a writer
+    os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+    with get_store_connection(store=store) as connection:
+        connection.execute("PRAGMA journal_mode=WAL")
+        connection.execute(
+            "CREATE TABLE IF NOT EXISTS responses ("
+            "key TEXT PRIMARY KEY, version TEXT, data BLOB, size INTEGER, lastAccess REAL, pinned INTEGER)"
+        )
+        connection.execute("CREATE INDEX IF NOT EXISTS responses_lastAccess ON responses (lastAccess)")
+        connection.execute("DELETE FROM responses WHERE version != ?", (version,))
+
+    return store
+
+
+def get_store_connection(store):
+    # sqlite3 connections cannot be shared between threads
+    if getattr(store['local'], 'connection', None) is None:
+        store['local'].connection = sqlite3.connect(store['path'], timeout=30)
+
+    return store['local'].connection
+
+
+def create_store_key(store, key):
+    return hashlib.sha256((store['version'] + repr(key)).encode('utf-8')).hexdigest()
+
+
+def get_stored_value(store, key):
+    store_key = create_store_key(store=store, key=key)
+    with get_store_connection(store=store) as connection:
+        row = connection.execute("SELECT data, lastAccess FROM responses WHERE key = ?", (store_key,)).fetchone()
+        if row is None:
+            return False, None
+
+        # Mark the entry as the most recently used, a recent mark is kept to leave the read a read
+        now = time.time()
+        if now - row[1] > store['touch_interval']:
+            connection.execute("UPDATE responses SET lastAccess = ? WHERE key = ?", (now, store_key))
+
+    return True, bytes(row[0])
+
+
+def set_stored_value(store, key, value, pinned=False):
+    # A value larger than the whole store is never kept, unless it is pinned
+    if len(value) > store['max_bytes'] and not pinned:
+        return
+
+    store_key = create_store_key(store=store, key=key)
+    with get_store_connection(store=store) as connection:
+        connection.execute(
+            "INSERT OR REPLACE INTO responses (key, version, data, size, lastAccess, pinned) VALUES (?, ?, ?, ?, ?, ?)",
+            (store_key, store['version'], sqlite3.Binary(value), len(value), time.time(), int(pinned))
+        )
+
+        # Evict the least recently used entries that are not pinned
+        size_bytes = connection.execute("SELECT COALESCE(SUM(size), 0) FROM responses").fetchone()[0]
+        if size_bytes > store['max_bytes']:
+            evicted_keys = []
+            for evicted_key, evicted_size in connection.execute(
+                    "SELECT key, size FROM responses WHERE pinned = 0 ORDER BY lastAccess"):
+                if size_bytes <= store['max_bytes']:
+                    break
+                evicted_keys.append((evicted_key,))
+                size_bytes -= evicted_size
+            connection.executemany("DELETE FROM responses WHERE key = ?", evicted_keys)
+
+    return
+
+
+# Key of the static layout of the app
+layout_cache_key = ('_dash-layout',)
+
+
+def create_callback_cache_key(body, input_keys=None):
+    # Reduce the values to what the callbacks read, e.g. the clicked point of a clickData
+    input_keys = input_keys or {}
+
+    def get_item_key(item):
+        value = item.get('value')
+        get_value_key = input_keys.get(str(item['id']) + "." + item['property'])
+        if get_value_key is not None:
+            value = get_value_key(value)
+        return (item['id'], item['property'], value)
+
+    # The callbacks do not use dash.callback_context, so changedPropIds is left out
+    return (
+        body['output'],
+        normalize_cache_key_value([get_item_key(item) for item in body.get('inputs', [])]),
+        normalize_cache_key_value([get_item_key(item) for item in body.get('state', [])]),
+    )
+
+
+def create_response_cache_key(request, input_keys=None):
+    # The layout of the app is static
+    if request.method == 'GET' and request.path.endswith('/_dash-layout'):
+        return layout_cache_key
+    if request.method != 'POST' or not request.path.endswith('/_dash-update-component'):
+        return None
+
+    body = request.get_json(silent=True)
+    if body is None:
+        return None
+
+    return create_callback_cache_key(body=body, input_keys=input_keys)
+
+
+def cache_dash_responses(app, lru_cache, store=None, input_keys=None):
+    """
+    Caches the encoded responses of a Dash app in an LRU cache.
+
+    The response of a callback is keyed by its output and the values of its inputs and states,
+    and the layout, which holds the figures without callback such as the sunburst, is stored
+    once. A hit returns the stored bytes before Dash is called, which skips the Plotly
+    validation and the JSON encoding of the figures. Only successful responses are stored, and
+    the compression registered by Dash still applies to the stored responses since it runs
+    after this hook. If a persistent store is given, the responses missing from the cache are
+    looked up in it, and the new responses are written to both.
+
+    Parameters
+    ----------
+    app : dash.Dash()
+        The app, with a static layout and callbacks that are pure functions of their inputs and states
+
+    lru_cache : dict()
+        The cache, see create_lru_cache
+
+    store : dict()
+        The persistent store shared by the workers, see create_sqlite_store, or None
+
+    input_keys : dict()
+        For the inputs whose value holds more than what their callback reads, 'id.property'
+        mapped to a function returning the part of the value that is read
+
+    Raises
+    ------
+    -
+
+    Returns
+    -------
+    -
+
+    Sources
+    -------
+    https://flask.palletsprojects.com/en/1.1.x/api/#flask.Flask.before_request
+
+    See Also
+    --------
+    create_lru_cache
+    create_sqlite_store
+    """
+
+    @app.server.before_request
+    def get_cached_response():
+        # Key the request, the response is stored once it has been encoded
+        key = create_response_cache_key(request=flask.request, input_keys=input_keys)
+        if key is None:
+            return None
+
+        found, data = get_cached_value(lru_cache=lru_cache, key=key)
+        if not found and store is not None:
+            found, data = get_stored_value(store=store, key=key)
+            if found:
+                set_cached_value(lru_cache=lru_cache, key=key, value=data)
+        if not found:
+            flask.g.response_cache_key = key
+            return None
+
+        return flask.Response(data, mimetype='application/json')
+
+    @app.server.after_request
+    def set_cached_response(response):
+        key = flask.g.pop('response_cache_key', None)
+        if key is not None and response.status_code == 200:
+            data = response.get_data()
+            set_cached_value(lru_cache=lru_cache, key=key, value=data)
+            if store is not None:
+                set_stored_value(store=store, key=key, value=data)
+
+        return response
+
+    return
+
+
+def get_lru_cache_stats(lru_cache):
+    with lru_cache['lock']:
+        stats = {
+            'entries': len(lru_cache['entries']),
+            'size_bytes': lru_cache['size_bytes'],
+            'hits': lru_cache['hits'],
+            'misses': lru_cache['misses'],
+        }
+
+    return stats
@@ -4,34 +4,43 @@
 
 
 # External lib
-import plotly.express as px
-import plotly.graph_objects as go
 import dash_html_components as html
 
 # Local lib
 from treemap import create_treemap_title
 from treemap import query_data_for_treemap
-from treemap import get_treemap_hover_template
-
-from bumpchart import create_bumpchart_fig
+from treemap import create_treemap_fig_for_data
 
 from table import create_table_title
 from table import query_data_for_table
 from table import create_table_fig
+from table import create_table_oldest_and_latest_fig
+
+import preprocess_vsCommon as common
 
 from barchart import create_empty_table_fig
 from barchart import create_filled_table_fig
 
 import hbarchart
 
-def callback_treemap(treemap_df, slider_min_year, slider_max_year, ddm_genre):
+import cache
+
+
+# Global variable
+# Cache of the callbacks, shared by all the visitors
+# Bounded by its number of figures, the encoded responses are bounded by their size in app.py
+figure_cache = cache.create_lru_cache(max_entries=256, max_bytes=None)
+
+
+@cache.memoize(figure_cache)
+def callback_treemap(treemap_cube, slider_min_year, slider_max_year, ddm_genre):
     """
     Handles the callback for the treemap
 
     Parameters
     ----------
-    treemap_df : pd.DataFrame()
-        The DataFrame containing all the data relevant for the treemap
+    treemap_cube : dict()
+        The count cube of the treemap data, see treemap.create_treemap_count_cube
 
     slider_min_year : int
         The min year selected on the slider
@@ -48,8 +57,8 @@ def callback_treemap(treemap_df, slider_min_year, slider_max_year, ddm_genre):
 
     Returns
     -------
-    treemap_fig : plotly.graph_object.Figure()
-        The treemap figure
+    treemap_fig : dict()
+        The treemap figure, see figure_dict.create_figure
 
     Sources
     -------
@@ -69,69 +78,20 @@ def callback_treemap(treemap_df, slider_min_year, slider_max_year, ddm_genre):
     
     # Get data
     temp_df = query_data_for_treemap(
-        df=treemap_df, 
+        treemap_cube=treemap_cube, 
         genre=ddm_genre, 
         from_year=slider_min_year, 
         to_year=slider_max_year
     )
 
-    # Create a figure with px
-    treemap_fig = px.treemap(
-        temp_df, 
-        path=['planete', 'continent', 'pays'], 
-        values='nombreDeFilms',
-        hover_name="pays",
-        color_discrete_sequence=px.colors.sequential.BuPu,
-    )
-    
-    treemap_fig.update_traces(
-        hovertemplate=get_treemap_hover_template(),
-        marker_line=dict(
-            color='grey'
-        )
-    )
-    treemap_fig.update_layout(
-        #height=500,
-        margin=dict(l=0,r=0,b=20,t=20),
-        paper_bgcolor='rgba(0,0,0,0)',
-        plot_bgcolor='rgba(0,0,0,0)'
-    )
+    # Create a fig
+    treemap_fig = create_treemap_fig_for_data(temp_df=temp_df)
     
     return treemap_title, treemap_fig
 
 
-def callback_bumpchart(bumpchart_df, ddm_genre):
-
-    fig = create_bumpchart_fig(bumpchart_df=bumpchart_df)
-
-    if ddm_genre == "All":
-        return fig
-    else:
-        fig = fig.update_traces(
-            marker_color="lightgrey",
-            hoverinfo='none',
-            )
-        x_data = bumpchart_df["decennie"]
-        y_data = bumpchart_df["rang"]
-        genreCat = bumpchart_df['genre']
-        
-        fig.add_trace(
-            go.Scatter(
-                x = x_data[genreCat==str(ddm_genre)],
-                y = y_data[genreCat==str(ddm_genre)],
-                name=ddm_genre,
-                mode='lines+markers',
-                marker_symbol='square',
-                marker_color='red',
-                marker_size=10,
-                hoverinfo='skip',
-            )
-        )
-
-        return fig
-
-
-def callback_table(table_df, slider_min_year, slider_max_year, ddm_genre, top_n):
+@cache.memoize(figure_cache)
+def callback_table(table_df, table_cube, table_year_index, slider_min_year, slider_max_year, ddm_genre, top_n):
     
     # Create new title
     table_title= create_table_title(
@@ -143,6 +103,8 @@ def callback_table(table_df, slider_min_year, slider_max_year, ddm_genre, top_n)
     # Get data
     top_n_df, oldest_df, latest_df = query_data_for_table(
         table_df=table_df, 
+        table_cube=table_cube,
+        table_year_index=table_year_index,
         genre=ddm_genre, 
         from_year=slider_min_year,
         to_year=slider_max_year, 
@@ -160,14 +122,59 @@ def callback_table(table_df, slider_min_year, slider_max_year, ddm_genre, top_n)
     return table_title, table_top_n_fig, table_latest_fig, table_oldest_fig
 
 
-def callback_barchart(distinction_df, barchart_click):
+@cache.memoize(figure_cache)
+def callback_table_oldest_and_latest(table_df, table_year_index, slider_min_year, slider_max_year, ddm_genre):
+    
+    # Get data, the top n languages are computed in the browser
+    oldest_df, latest_df = common.get_oldest_and_latest_rows(
+        df=table_df,
+        year_index=table_year_index,
+        genre=ddm_genre,
+        from_year=slider_min_year,
+        to_year=slider_max_year
+    )
+
+    # Create a fig
+    table_latest_fig, table_oldest_fig = create_table_oldest_and_latest_fig(
+        oldest_df=oldest_df, 
+        latest_df=latest_df
+    )
+
+    return table_latest_fig, table_oldest_fig
+
+
+def get_barchart_click_key(barchart_click):
+    # The table only depends on the person clicked
+    if barchart_click is None:
+        return None
+    
+    return barchart_click['points'][0]['text']
+
+
+@cache.memoize(figure_cache)
+def callback_barchart(distinction_df, distinction_index, barchart_click):
 
     if barchart_click is None:
         return create_empty_table_fig(distinction_df=distinction_df)
     else:
-        return create_filled_table_fig(distinction_df=distinction_df, name=barchart_click['points'][0]['text']) 
+        return create_filled_table_fig(distinction_index=distinction_index, name=barchart_click['points'][0]['text']) 
+
+@cache.memoize(figure_cache)
+def callback_hbarchart(h_barchart_ddm, h_barchart_matrix, h_barchart_tensor=None, baseline="all", from_year=None, to_year=None):
+    fig = hbarchart.create_h_barchart_fig(h_barchart_ddm, h_barchart_matrix, h_barchart_tensor, baseline, from_year, to_year)
+
+    return fig
+
+
+def callback_hbarchart_options(producer_index, search_value, ddm_value):
+    # Not memoized, the search is fast and its responses are cached by cache.cache_dash_responses
+
+    # The selected producer stays in the options, or it would not be displayed
+    options = [] if ddm_value is None else [hbarchart.create_producer_option(name=ddm_value)]
 
-def callback_hbarchart(h_barchart_ddm, h_barchart_df, avg_df):
-    fig = hbarchart.create_h_barchart_fig(h_barchart_ddm, h_barchart_df, avg_df)
+    # Add the producers found
+    for name in hbarchart.search_producers(producer_index=producer_index, search_value=search_value):
+        if name != ddm_value:
+            options.append(hbarchart.create_producer_option(name=name, search_value=search_value))
 
-    return fig
\ No newline at end of file
+    return options
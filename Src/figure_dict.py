@@ -0,0 +1,96 @@
+#
+# This file contains the functions used to create the figures as plain dicts.
+#
+
+
+# External lib
+import plotly.io as pio
+
+
+# Local lib
+# none
+
+
+# Global variable
+# Default template, serialized once
+default_template = {}
+
+
+def get_default_template():
+    """
+    Returns the default plotly template, serialized as a dict.
+
+    A go.Figure or a px figure adds this template to its layout, a figure created as a plain
+    dict must add it too to be rendered the same way.
+
+    Parameters
+    ----------
+    -
+
+    Raises
+    ------
+    -
+
+    Returns
+    -------
+    template : dict()
+        The default template, shared by all the figures, it must not be modified
+
+    Sources
+    -------
+    https://plotly.com/python/templates/
+
+    See Also
+    --------
+    create_figure
+    """
+
+    # Serialize the template on the first call only
+    if pio.templates.default not in default_template:
+        default_template[pio.templates.default] = pio.templates[pio.templates.default].to_plotly_json()
+
+    return default_template[pio.templates.default]
+
+
+def create_figure(data, layout):
+    """
+    Creates a figure as a plain dict, without the validation of go.Figure.
+
+    The traces and the layout must be written as go.Figure().to_plotly_json() would write
+    them, e.g. the magic underscores as nested dicts, marker_color as {'marker': {'color': ...}}
+    and a title as {'title': {'text': ...}}. Arrays can be lists, numpy arrays or pandas series,
+    they are serialized by plotly.utils.PlotlyJSONEncoder as Dash does for any figure.
+
+    Parameters
+    ----------
+    data : list()
+        The traces of the figure, each one a dict with its 'type'
+
+    layout : dict()
+        The layout of the figure, without template
+
+    Raises
+    ------
+    -
+
+    Returns
+    -------
+    fig : dict()
+        The figure, to be given to dcc.Graph or returned by a callback
+
+    Sources
+    -------
+    https://plotly.com/python/figure-structure/
+
+    See Also
+    --------
+    get_default_template
+    """
+
+    # Same template as go.Figure
+    fig = {
+        'data': data,
+        'layout': dict(layout, template=get_default_template()),
+    }
+
+    return fig
@@ -4,16 +4,20 @@
 
 
 # External lib
+import bisect
+import heapq
+import unicodedata
+
 import numpy as np
 import pandas as pd
 
 import dash
 import dash_html_components as html
 import dash_core_components as dcc
-import plotly.graph_objects as go
 
 # Internal lib
 import preprocess_vsHBarChart
+import figure_dict
 
 def get_h_barchart_hover_template():
     '''
@@ -29,93 +33,479 @@ def get_h_barchart_hover_template():
     return hover
 
 
-def create_h_barchart_dropdown_menu(h_barchart_df):
-    # Create options
-    options = h_barchart_df["nomComplet"].map(lambda n: {"label": n, "value": n})
-    # Create menu
+def normalize_producer_name(name):
+    # Accents, case and repeated spaces are ignored by the search
+    temp_str = unicodedata.normalize('NFKD', name)
+    temp_str = ''.join(c for c in temp_str if not unicodedata.combining(c))
+    return ' '.join(temp_str.casefold().split())
+
+
+def create_producer_index(h_barchart_df):
+    """
+    Creates the search index of the producers of the horizontal bar chart.
+
+    Each producer appears once, whatever its number of genres. Every suffix of the normalized
+    names is kept in a sorted list, so the names containing a search value are found by
+    bisection, see search_producers.
+
+    Parameters
+    ----------
+    h_barchart_df : pd.DataFrame()
+        The preprocessed data of the horizontal bar chart, one row per producer and genre with films
+
+    Raises
+    ------
+    -
+
+    Returns
+    -------
+    producer_index : dict()
+        The names, sorted by normalized name, and the sorted suffixes of the normalized names
+        with the position of their name and their start in the name
+
+    Sources
+    -------
+    https://en.wikipedia.org/wiki/Suffix_array
+
+    See Also
+    --------
+    search_producers
+    """
+
+    # Unique names, sorted by normalized name
+    names = list(pd.unique(h_barchart_df['nomComplet'].dropna().values))
+    normalized_names = [normalize_producer_name(name) for name in names]
+    order = sorted(range(len(names)), key=lambda i: (normalized_names[i], names[i]))
+    names = [names[i] for i in order]
+    normalized_names = [normalized_names[i] for i in order]
+
+    # Every suffix of every normalized name
+    suffixes = sorted(
+        (normalized_name[start:], position, start)
+        for position, normalized_name in enumerate(normalized_names)
+        for start in range(len(normalized_name))
+    )
+
+    producer_index = {
+        'names': names,
+        'normalized_names': normalized_names,
+        'suffixes': [suffix for suffix, _, _ in suffixes],
+        'suffix_positions': [position for _, position, _ in suffixes],
+        'suffix_starts': [start for _, _, start in suffixes],
+    }
+
+    return producer_index
+
+
+def search_producers(producer_index, search_value, max_results=50):
+    """
+    Searches the producers whose normalized name contains the normalized search value.
+
+    The names starting with the search value come first, then the names with a word starting
+    with it, then the others, each group in the order of the normalized names.
+
+    Parameters
+    ----------
+    producer_index : dict()
+        The search index, see create_producer_index
+
+    search_value : str()
+        The text typed in the dropdown menu
+
+    max_results : int
+        The maximal number of names returned
+
+    Raises
+    ------
+    -
+
+    Returns
+    -------
+    names : list()
+        The matching names, at most max_results
+
+    Sources
+    -------
+    -
+
+    See Also
+    --------
+    create_producer_index
+    """
+
+    query = normalize_producer_name(search_value or '')
+    if not query:
+        return []
+
+    # Suffixes starting with the query, i.e. names containing it
+    suffixes = producer_index['suffixes']
+    start = bisect.bisect_left(suffixes, query)
+    end = bisect.bisect_left(suffixes, query + chr(0x10FFFF), lo=start)
+
+    # Best rank of each name
+    ranks = {}
+    for i in range(start, end):
+        position = producer_index['suffix_positions'][i]
+        suffix_start = producer_index['suffix_starts'][i]
+        if suffix_start == 0:
+            rank = 0
+        elif producer_index['normalized_names'][position][suffix_start - 1] == ' ':
+            rank = 1
+        else:
+            rank = 2
+        ranks[position] = min(rank, ranks.get(position, rank))
+
+    positions = heapq.nsmallest(max_results, ranks, key=lambda position: (ranks[position], position))
+
+    return [producer_index['names'][position] for position in positions]
+
+
+def is_shown_by_dropdown_menu(label, search_value):
+    # dcc.Dropdown also filters the options in the browser: each word of the search value
+    # must be in a word of the label, ignoring the case but not the accents
+    label_words = label.lower().split()
+    return all(
+        any(search_word in label_word for label_word in label_words)
+        for search_word in search_value.lower().split()
+    )
+
+
+def create_producer_option(name, search_value=''):
+    # A name found without its accents is labelled with its normalized name too, so the browser keeps it
+    label = name
+    if not is_shown_by_dropdown_menu(label=name, search_value=search_value):
+        label = name + " (" + normalize_producer_name(name) + ")"
+
+    return {"label": label, "value": name}
+
+
+def create_h_barchart_dropdown_menu(producer):
+    # Create menu, the options are searched on the server as the user types
     ddm = dcc.Dropdown(
         id='hbarchart-dropdown-menu',
-        options=options,
-        value='Étienne Desrosiers',
+        options=[create_producer_option(name=producer)],
+        value=producer,
+        placeholder="Rechercher un producteur",
     )
 
     return ddm
 
 
-def sort_genres(data_df):
-    if data_df['Genres'] == "n.d.":
-        return -1
-    return data_df['Producer']
+def create_h_barchart_matrix(h_barchart_df, avg_df):
+    """
+    Creates the matrix of the number of films of each producer by genre, used to create the
+    horizontal bar chart of a producer without scanning h_barchart_df.
+
+    The genre "Sf" of h_barchart_df is the genre "SF" of avg_df, both are labelled "SF".
+    The producer and genre pairs missing from h_barchart_df, i.e. without films, are zeros.
+
+    Parameters
+    ----------
+    h_barchart_df : pd.DataFrame()
+        The preprocessed data of the horizontal bar chart, one row per producer and genre with films
+
+    avg_df : pd.DataFrame()
+        The average number of films of the producers by genre
+
+    Raises
+    ------
+    -
+
+    Returns
+    -------
+    h_barchart_matrix : dict()
+        The genres, "n.d." first then in the order of avg_df, the row of each producer, the
+        number of films of each producer (row) by genre (column) and the average of each genre
+
+    Sources
+    -------
+    -
+
+    See Also
+    --------
+    create_h_barchart_fig
+    """
+
+    # Same genre labels in both data
+    avg_genres = avg_df['genre'].astype(object).replace(['Sf'], 'SF')
+    h_barchart_genres = h_barchart_df['genre'].astype(object).replace(['Sf'], 'SF')
+
+    # Fixed order of the genres, "n.d." first
+    genres = pd.unique(pd.concat([pd.Series(["n.d."]), avg_genres, h_barchart_genres], ignore_index=True))
+
+    # Row of each producer
+    producer_codes, producers = pd.factorize(h_barchart_df['nomComplet'].astype(object))
+    rows = pd.Series(np.arange(len(producers)), index=producers)
+
+    # Number of films by producer and genre
+    counts = np.zeros((len(producers), len(genres)), dtype='int64')
+    np.add.at(
+        counts,
+        (producer_codes, pd.Index(genres).get_indexer(h_barchart_genres)),
+        h_barchart_df['nombreDeFilms'].fillna(0).to_numpy(dtype='int64')
+    )
+
+    # Average by genre, 0 for a genre without average
+    averages = pd.Series(avg_df['moyenne'].values, index=avg_genres.values).reindex(genres).fillna(0).round(1).values
+
+    h_barchart_matrix = {
+        'genres': genres,
+        'rows': rows,
+        'counts': counts,
+        'averages': averages,
+    }
+
+    return h_barchart_matrix
+
 
+def create_h_barchart_tensor(h_barchart_decade_df, h_barchart_matrix):
+    """
+    Creates the tensor of the number of films of each producer by genre and decade, used to
+    compare a producer with the average of the producers over a period.
 
-def create_h_barchart_fig(producer, h_barchart_df, avg_df):
+    The counts are cumulated over the decades, so the number of films of a period is the
+    difference of two decades, whatever its length. The number of producers active in each
+    period, i.e. with at least one film in it, is computed once for all the periods.
+
+    Parameters
+    ----------
+    h_barchart_decade_df : pd.DataFrame()
+        The preprocessed data of the horizontal bar chart by decade, one row per producer,
+        genre and decade with films, the decade given by its first year 'debutDecennie'
+
+    h_barchart_matrix : dict()
+        The matrix of the horizontal bar chart, its rows and genres are used, see
+        create_h_barchart_matrix
+
+    Raises
+    ------
+    -
+
+    Returns
+    -------
+    h_barchart_tensor : dict()
+        The decades by first year, the cumulated number of films by producer (row of h_barchart_matrix),
+        genre and decade, the cumulated number of films by genre and decade, the number of
+        active producers of each period and the first and last decade of each producer
+
+    Sources
+    -------
+    https://en.wikipedia.org/wiki/Prefix_sum
+
+    See Also
+    --------
+    compute_h_barchart_baseline
+    """
+
+    # Same genre labels as the matrix
+    genres = h_barchart_decade_df['genre'].astype(object).replace(['Sf'], 'SF')
+
+    # Position of each row in the tensor, the producers and genres unknown to the matrix are left out
+    rows = h_barchart_matrix['rows'].reindex(h_barchart_decade_df['nomComplet'].astype(object)).values
+    genre_positions = pd.Index(h_barchart_matrix['genres']).get_indexer(genres)
+    decades = np.sort(pd.unique(h_barchart_decade_df['debutDecennie'].dropna().astype('int64')))
+    decade_positions = np.searchsorted(decades, h_barchart_decade_df['debutDecennie'].fillna(-1).astype('int64'))
+    is_known = ~np.isnan(rows) & (genre_positions >= 0) & h_barchart_decade_df['debutDecennie'].notna().values
+
+    # Number of films by producer, genre and decade
+    counts = np.zeros((len(h_barchart_matrix['rows']), len(h_barchart_matrix['genres']), len(decades)), dtype='int32')
+    np.add.at(
+        counts,
+        (rows[is_known].astype('int64'), genre_positions[is_known], decade_positions[is_known]),
+        h_barchart_decade_df['nombreDeFilms'].fillna(0).to_numpy(dtype='int64')[is_known]
+    )
+
+    # Cumulated over the decades, the first decade is preceded by zeros
+    cumulated_counts = np.zeros(counts.shape[:2] + (len(decades) + 1,), dtype='int32')
+    np.cumsum(counts, axis=2, out=cumulated_counts[:, :, 1:])
+
+    # Number of producers active in each period, from its first to its last decade
+    is_active = counts.sum(axis=1) > 0
+    cumulated_activity = np.zeros((len(is_active), len(decades) + 1), dtype='int32')
+    np.cumsum(is_active, axis=1, out=cumulated_activity[:, 1:])
+    active_producers = np.zeros((len(decades), len(decades)), dtype='int64')
+    for first in range(len(decades)):
+        active_producers[first, first:] = (
+            (cumulated_activity[:, first + 1:] - cumulated_activity[:, [first]]) > 0
+        ).sum(axis=0)
+
+    # First and last decade of each producer, -1 for a producer without dated films
+    has_activity = is_active.any(axis=1)
+    first_decades = np.where(has_activity, is_active.argmax(axis=1), -1)
+    last_decades = np.where(has_activity, len(decades) - 1 - is_active[:, ::-1].argmax(axis=1), -1)
+
+    h_barchart_tensor = {
+        'decades': decades,
+        'cumulated_counts': cumulated_counts,
+        'cumulated_genre_counts': cumulated_counts.sum(axis=0, dtype='int64'),
+        'active_producers': active_producers,
+        'first_decades': first_decades,
+        'last_decades': last_decades,
+    }
+
+    return h_barchart_tensor
+
+
+def compute_h_barchart_baseline(h_barchart_tensor, first, last):
+    """
+    Computes the average number of films by genre of the producers active from the decade at
+    position first to the decade at position last, counting only the films of these decades.
+
+    Parameters
+    ----------
+    h_barchart_tensor : dict()
+        The tensor of the horizontal bar chart, see create_h_barchart_tensor
+
+    first : int
+        The position of the first decade of the period in h_barchart_tensor['decades']
+
+    last : int
+        The position of the last decade of the period in h_barchart_tensor['decades']
+
+    Raises
+    ------
+    -
+
+    Returns
+    -------
+    averages : np.array()
+        The average by genre, in the order of the genres of the matrix, rounded as avg_df is.
+        The averages of a period without active producers are zeros.
+
+    Sources
+    -------
+    -
+
+    See Also
+    --------
+    create_h_barchart_tensor
+    """
+
+    # Films of the period, by genre
+    cumulated_genre_counts = h_barchart_tensor['cumulated_genre_counts']
+    if last < first:
+        return np.zeros(len(cumulated_genre_counts))
+    genre_counts = cumulated_genre_counts[:, last + 1] - cumulated_genre_counts[:, first]
+
+    # Divided by the number of producers active in the period
+    active_producers = h_barchart_tensor['active_producers'][first, last]
+    if active_producers == 0:
+        return np.zeros(len(cumulated_genre_counts))
+
+    return np.round(genre_counts / active_producers, 1)
+
+
+def query_data_for_h_barchart(producer, h_barchart_matrix, h_barchart_tensor=None, baseline="all", from_year=None, to_year=None):
     
-    # Set variables used for fig
-    y_avg = avg_df['genre'].values
-    x_avg = avg_df['moyenne'].values
-    #y_producer = h_barchart_df[h_barchart_df['nomComplet']==producer]['genre'].values
-    #x_producer = h_barchart_df[h_barchart_df['nomComplet']==producer]['nombreDeFilms'].values
+    # Row of the producer, none for an unknown producer
+    row = h_barchart_matrix['rows'].get(producer)
+    no_counts = np.zeros(len(h_barchart_matrix['genres']), dtype='int64')
 
-    producer_data = h_barchart_df[h_barchart_df['nomComplet']==producer][['genre', 'nombreDeFilms']]
-    y_producer = producer_data['genre'].values
-    x_producer = producer_data['nombreDeFilms'].values
+    # Period of the baseline: the chosen years, or the active years of the producer
+    first = last = None
+    if baseline == "window" and h_barchart_tensor is not None:
+        decades = h_barchart_tensor['decades']
+        first = np.searchsorted(decades, from_year - from_year % 10, side='left')
+        last = np.searchsorted(decades, to_year, side='right') - 1
+    elif baseline == "cohort" and h_barchart_tensor is not None and row is not None and h_barchart_tensor['first_decades'][row] >= 0:
+        first = h_barchart_tensor['first_decades'][row]
+        last = h_barchart_tensor['last_decades'][row]
 
-    data_df = avg_df[['genre', 'moyenne']].merge(producer_data, on='genre', how='outer')
-    data_df = data_df.rename(columns={'genre': 'Genres', 'moyenne': 'Moyenne', 'nombreDeFilms': 'Producer'})
-    data_df = data_df.fillna(0)
-    #data_df = pd.DataFrame({'Genres' : y_avg, 'Moyenne': x_avg, 'Producer': x_producer})
+    # All the years, as precomputed in avg_df
+    if first is None:
+        counts = h_barchart_matrix['counts'][row] if row is not None else no_counts
+        return counts, h_barchart_matrix['averages'], None
 
-    data_df = data_df.iloc[data_df.apply(sort_genres, axis=1).argsort()]
-    data_df['Moyenne'] = data_df['Moyenne'].round(1)
-    data_df['Genres'] = data_df['Genres'].replace(['Sf'], 'SF')
+    # Films of the producer and average of the producers active in the period
+    averages = compute_h_barchart_baseline(h_barchart_tensor=h_barchart_tensor, first=first, last=last)
+    if row is None or last < first:
+        counts = no_counts
+    else:
+        cumulated_counts = h_barchart_tensor['cumulated_counts'][row]
+        counts = cumulated_counts[:, last + 1] - cumulated_counts[:, first]
 
-    # Instatiate new fig
-    fig = go.Figure()
+    # Years of the period, for the title
+    decades = h_barchart_tensor['decades']
+    if last < first:
+        period = (from_year, to_year)
+    else:
+        period = (int(decades[first]), int(decades[last]) + 9)
+
+    return counts, averages, period
+
+
+def create_h_barchart_fig(producer, h_barchart_matrix, h_barchart_tensor=None, baseline="all", from_year=None, to_year=None):
     
-    # Add trace for average
-    fig.add_trace(
-        go.Bar(
-            name="Moyenne",
-            x=data_df['Moyenne'],
-            y=data_df['Genres'],
-            orientation='h',
-            marker_color = '#9C1D00',
-            hovertemplate=get_h_barchart_hover_template(),
-            text='Moyenne',
-        )
-    )
-    # Add trace for the producer
-    fig.add_trace(
-        go.Bar(
-            name=producer, 
-            x=data_df['Producer'],
-            y=data_df['Genres'],
-            orientation='h',
-            marker_color = '#81B4E3',
-            hovertemplate=get_h_barchart_hover_template(),
-            text=[producer],
-        )
+    # Number of films of the producer and average of the producers by genre
+    counts, averages, period = query_data_for_h_barchart(
+        producer=producer,
+        h_barchart_matrix=h_barchart_matrix,
+        h_barchart_tensor=h_barchart_tensor,
+        baseline=baseline,
+        from_year=from_year,
+        to_year=to_year
     )
 
+    # "n.d." first, then by increasing number of films of the producer
+    order = np.concatenate([[0], 1 + np.argsort(counts[1:], kind='stable')])
+
+    # Set variables used for fig
+    y_genres = h_barchart_matrix['genres'][order]
+    x_avg = averages[order]
+    x_producer = counts[order]
+
     # Compose title
     title_str = "Genres explorés par " + producer
+    if period is not None:
+        title_str += " entre " + str(period[0]) + " et " + str(period[1])
     
-    # Set layout
-    fig.update_layout(
-        title=title_str,
-        title_x=0.45,
-        font_family="Helvetica",
-        font_color="#3B3838",
-        barmode='group',
-        xaxis_title="Nombre de films",
-        yaxis_title="Genre",
-        height=600,
-        xaxis_fixedrange=True,
-        yaxis_fixedrange=True,
-        paper_bgcolor='rgba(0,0,0,0)',
-        plot_bgcolor='white'
+    # Instatiate new fig
+    fig = figure_dict.create_figure(
+        data=[
+            # Add trace for average
+            dict(
+                type='bar',
+                name="Moyenne",
+                x=x_avg,
+                y=y_genres,
+                orientation='h',
+                marker=dict(color='#9C1D00'),
+                hovertemplate=get_h_barchart_hover_template(),
+                text='Moyenne',
+            ),
+            # Add trace for the producer
+            dict(
+                type='bar',
+                name=producer, 
+                x=x_producer,
+                y=y_genres,
+                orientation='h',
+                marker=dict(color='#81B4E3'),
+                hovertemplate=get_h_barchart_hover_template(),
+                text=[producer],
+            ),
+        ],
+        # Set layout
+        layout=dict(
+            title=dict(text=title_str, x=0.45),
+            font=dict(family="Helvetica", color="#3B3838"),
+            barmode='group',
+            xaxis=dict(
+                title=dict(text="Nombre de films"),
+                fixedrange=True,
+                showgrid=True,
+                gridwidth=1,
+                gridcolor='grey'
+            ),
+            yaxis=dict(
+                title=dict(text="Genre"),
+                fixedrange=True
+            ),
+            height=600,
+            paper_bgcolor='rgba(0,0,0,0)',
+            plot_bgcolor='white'
+        )
     )
-    fig.update_xaxes(showgrid=True, gridwidth=1, gridcolor='grey')
 
     return fig
 
@@ -136,15 +526,59 @@ def create_h_barchart_graph(h_barchart_fig):
     return h_barchart_graph
 
 
-def create_h_barchart(h_barchart_graph, h_barchart_ddm):  # h_barchart_title
+def create_h_barchart_baseline_radio_items():
+    # Period of the average of the producers
+    ri = dcc.RadioItems(
+        id='hbarchart-baseline-radio-items',
+        options=[
+            {'label': "Toutes les années", 'value': "all"},
+            {'label': "Période choisie", 'value': "window"},
+            {'label': "Années actives du producteur", 'value': "cohort"},
+        ],
+        value="all",
+        labelStyle={'display': 'inline-block', 'margin-right': '10px'},
+    )
+
+    return ri
+
+
+def create_h_barchart_range_slider(h_barchart_tensor):
+    
+    # Periods by decade, the slider is used by the "window" baseline only
+    # The values are the first years of the decades, each mark shows the years of its decade
+    decades = h_barchart_tensor['decades']
+    year_min = int(decades[0])
+    year_max = int(decades[-1])
+
+    rs = dcc.RangeSlider(
+        id='hbarchart-range-slider',
+        min=year_min,
+        max=year_max,
+        step=10,
+        value=[year_min, year_max],
+        pushable=False,
+        allowCross=False,
+        dots=False,
+        updatemode='mouseup',
+        disabled=True,
+        marks={str(year): str(year) + "-" + str(year + 9) for year in range(year_min, year_max + 1, 20)},
+    )
+
+    return rs
+
+
+def create_h_barchart(h_barchart_graph, h_barchart_ddm, h_barchart_ri=None, h_barchart_rs=None):  # h_barchart_title
     
     h_barchart = html.Div(
         style={'width':'600px'}, # style is set in app.py
         children=[
             #h_barchart_title,
             h_barchart_ddm,
+        ] + [
+            component for component in [h_barchart_ri, h_barchart_rs] if component is not None
+        ] + [
             h_barchart_graph,
         ]   
     )
 
-    return h_barchart
\ No newline at end of file
+    return h_barchart
@@ -6,7 +6,13 @@
 # External lib
 import numpy as np
 import pandas as pd
+import concurrent.futures
 import datetime
+import hashlib
+import json
+import os
+import warnings
+import pyarrow.feather as feather
 
 
 # Internal lib
@@ -15,17 +21,192 @@ import preprocess_vsCommon
 
 # Global variable
 relative_path = "./Src/assets/data/"
+manifest_file_name = "p_manifest.json"
+
+# Raw files read by create_master_film_df() and backend_load_distinction(), with the dtype of the columns read
+#   ids are int32, ids that may be missing are float64 as they would be inferred, years are float32
+#   str columns joined into the film df stay object, the cleaning steps expect it
+raw_file_schemas = {
+    "film.csv": {
+        'FilmoId': 'int32',
+        'titreOriginal': 'object',
+        'anneeSortie': 'float32',
+    },
+    "film_generique.csv": {
+        'filmoId': 'int32',
+        'nomId': 'float64',
+        'fonctionId': 'float64',
+    },
+    "fonction.csv": {
+        'FonctionId': 'int32',
+        'terme': 'object',
+    },
+    "nom.csv": {
+        'NomId': 'int32',
+        'nom': 'object',
+        'prenom': 'object',
+    },
+    "film_langue.csv": {
+        'filmoId': 'int32',
+        'langueId': 'int32',
+    },
+    "langue.csv": {
+        'LangueId': 'int32',
+        'terme': 'object',
+    },
+    "film_pays.csv": {
+        'filmoId': 'int32',
+        'paysId': 'int32',
+    },
+    "pays.csv": {
+        'PaysId': 'int32',
+        'terme': 'object',
+    },
+    "continent.csv": {
+        'continent': 'object',
+        'pays': 'object',
+        'capitale': 'object',
+    },
+    "film_genreCategorie.csv": {
+        'filmoId': 'int32',
+        'sujetId': 'int32',
+    },
+    "genreCategorie_wikidata.csv": {
+        'sujetId': 'int32',
+        'lienWikidata': 'object',
+    },
+    "film_genre.csv": {
+        'genre': 'object',
+        'genreLabel': 'object',
+    },
+    "genre_hierarchie.csv": {
+        'data': 'object',
+        'genre': 'object',
+        'subgenre_0': 'object',
+        'subgenre_1': 'object',
+    },
+    "distinction.csv": {
+        'personLabel': 'category',
+        'distinction': 'object',
+        'distinctionLabel': 'category',
+        'date': 'object',
+    },
+}
+raw_file_names = list(raw_file_schemas)
+
+# Preprocessed files read by the app, stored as uncompressed feather files that the workers memory map
+#   columns: dtype of each column, string dimensions are stored as categoricals
+#   fill_na: string columns whose missing values are set to "n.d."
+#   title:   string columns set to title case, after fill_na
+#   fix_sf:  string columns where 'Sf' is set to 'SF'
+# As in .csv files, an empty string is a missing value
+preprocessed_file_schemas = {
+    "p_sunburst.feather": {
+        'columns': {
+            'titreOriginal': 'object',
+            'genreIdentifiant': 'object',
+            'genre': 'object',
+            'sousGenre0': 'object',
+            'sousGenre1': 'object',
+        },
+        'fill_na': [],
+        'title': [],
+        'fix_sf': [],
+    },
+    "p_bumpchart.feather": {
+        'columns': {
+            'decennie': 'Int64',
+            'genre': 'category',
+            'compte': 'Int64',
+            'rang': 'Int64',
+        },
+        'fill_na': ['genre'],
+        'title': [],
+        'fix_sf': ['genre'],
+    },
+    "p_treemap.feather": {
+        'columns': {
+            'titreOriginal': 'object',
+            'anneeSortie': 'Int64',
+            'planete': 'category',
+            'continent': 'category',
+            'pays': 'category',
+            'genre': 'category',
+        },
+        'fill_na': ['titreOriginal', 'planete', 'continent', 'pays', 'genre'],
+        'title': [],
+        'fix_sf': ['genre'],
+    },
+    "p_table.feather": {
+        'columns': {
+            'titreOriginal': 'object',
+            'anneeSortie': 'Int64',
+            'langue': 'category',
+            'genre': 'category',
+        },
+        'fill_na': ['titreOriginal', 'langue', 'genre'],
+        'title': [],
+        'fix_sf': ['genre'],
+    },
+    "p_distinction.feather": {
+        'columns': {
+            'nomComplet': 'category',
+            'lienWikidata': 'object',
+            'distinction': 'category',
+            'date': 'datetime64[ns]',
+            'annee': 'Int64',
+        },
+        'fill_na': [],
+        'title': [],
+        'fix_sf': [],
+    },
+    "p_h_barchart.feather": {
+        'columns': {
+            'nomComplet': 'category',
+            'genre': 'category',
+            'nombreDeFilms': 'Int64',
+        },
+        'fill_na': ['nomComplet', 'genre'],
+        'title': ['nomComplet'],
+        'fix_sf': [],
+    },
+    "p_h_barchart_decade.feather": {
+        'columns': {
+            'nomComplet': 'category',
+            'genre': 'category',
+            'debutDecennie': 'Int64',
+            'nombreDeFilms': 'Int64',
+        },
+        'fill_na': ['nomComplet', 'genre'],
+        'title': ['nomComplet'],
+        'fix_sf': [],
+    },
+    "p_avg.feather": {
+        'columns': {
+            'genre': 'category',
+            'moyenne': 'float64',
+        },
+        'fill_na': ['genre'],
+        'title': [],
+        'fix_sf': ['genre'],
+    },
+}
+preprocessed_file_names = list(preprocessed_file_schemas)
+# The app starts without these files, the features using them are hidden until they are built
+optional_preprocessed_file_names = ["p_h_barchart_decade.feather"]
 
 def backend_load_film():
     # Set file path and name
     file_name = "film.csv"
     full_path = relative_path + file_name
     
-    # Read csv
+    # Read csv, only the needed columns with their dtype
     temp_df = pd.read_csv(
         filepath_or_buffer=full_path,
         sep=',',
         header=0,
+        usecols=list(raw_file_schemas[file_name]),
+        dtype=raw_file_schemas[file_name],
     )
     
     return temp_df
@@ -51,11 +232,13 @@ def backend_load_film_language():
     file_name = "film_langue.csv"
     full_path = relative_path + file_name
     
-    # Read csv
+    # Read csv, only the needed columns with their dtype
     temp_df = pd.read_csv(
         filepath_or_buffer=full_path,
         sep=',',
-        header=0
+        header=0,
+        usecols=list(raw_file_schemas[file_name]),
+        dtype=raw_file_schemas[file_name],
     )
     
     return temp_df
@@ -66,11 +249,13 @@ def backend_load_language():
     file_name = "langue.csv"
     full_path = relative_path + file_name
     
-    # Read csv
+    # Read csv, only the needed columns with their dtype
     temp_df = pd.read_csv(
         filepath_or_buffer=full_path,
         sep=',',
-        header=0
+        header=0,
+        usecols=list(raw_file_schemas[file_name]),
+        dtype=raw_file_schemas[file_name],
     )
     
     return temp_df
@@ -81,11 +266,13 @@ def backend_load_film_country():
     file_name = "film_pays.csv"
     full_path = relative_path + file_name
     
-    # Read csv
+    # Read csv, only the needed columns with their dtype
     temp_df = pd.read_csv(
         filepath_or_buffer=full_path,
         sep=',',
-        header=0
+        header=0,
+        usecols=list(raw_file_schemas[file_name]),
+        dtype=raw_file_schemas[file_name],
     )
     
     return temp_df
@@ -96,11 +283,13 @@ def backend_load_country():
     file_name = "pays.csv"
     full_path = relative_path + file_name
     
-    # Read csv
+    # Read csv, only the needed columns with their dtype
     temp_df = pd.read_csv(
         filepath_or_buffer=full_path,
         sep=',',
-        header=0
+        header=0,
+        usecols=list(raw_file_schemas[file_name]),
+        dtype=raw_file_schemas[file_name],
     )
     
     return temp_df
@@ -111,11 +300,13 @@ def backend_load_continent():
     file_name = "continent.csv"
     full_path = relative_path + file_name
     
-    # Read csv
+    # Read csv, only the needed columns with their dtype
     temp_df = pd.read_csv(
         filepath_or_buffer=full_path,
         sep=',',
-        header=0
+        header=0,
+        usecols=list(raw_file_schemas[file_name]),
+        dtype=raw_file_schemas[file_name],
     )
     
     return temp_df
@@ -141,11 +332,13 @@ def backend_load_name():
     file_name = "nom.csv"
     full_path = relative_path + file_name
     
-    # Read csv
+    # Read csv, only the needed columns with their dtype
     temp_df = pd.read_csv(
         filepath_or_buffer=full_path,
         sep=',',
-        header=0
+        header=0,
+        usecols=list(raw_file_schemas[file_name]),
+        dtype=raw_file_schemas[file_name],
     )
     
     return temp_df
@@ -172,11 +365,13 @@ def backend_load_function():
     file_name = "fonction.csv"
     full_path = relative_path + file_name
     
-    # Read csv
+    # Read csv, only the needed columns with their dtype
     temp_df = pd.read_csv(
         filepath_or_buffer=full_path,
         sep=',',
-        header=0
+        header=0,
+        usecols=list(raw_file_schemas[file_name]),
+        dtype=raw_file_schemas[file_name],
     )
     
     return temp_df
@@ -187,11 +382,13 @@ def backend_load_generic():
     file_name = "film_generique.csv"
     full_path = relative_path + file_name
     
-    # Read csv
+    # Read csv, only the needed columns with their dtype
     temp_df = pd.read_csv(
         filepath_or_buffer=full_path,
         sep=',',
-        header=0
+        header=0,
+        usecols=list(raw_file_schemas[file_name]),
+        dtype=raw_file_schemas[file_name],
     )
     
     return temp_df
@@ -202,11 +399,13 @@ def backend_load_film_genre_category():
     file_name = "film_genreCategorie.csv"
     full_path = relative_path + file_name
     
-    # Read csv
+    # Read csv, only the needed columns with their dtype
     temp_df = pd.read_csv(
         filepath_or_buffer=full_path,
         sep=',',
-        header=0
+        header=0,
+        usecols=list(raw_file_schemas[file_name]),
+        dtype=raw_file_schemas[file_name],
     )
     
     return temp_df
@@ -217,11 +416,13 @@ def backend_load_genre_category_wiki():
     file_name = "genreCategorie_wikidata.csv"
     full_path = relative_path + file_name
     
-    # Read csv
+    # Read csv, only the needed columns with their dtype
     temp_df = pd.read_csv(
         filepath_or_buffer=full_path,
         sep=',',
-        header=0
+        header=0,
+        usecols=list(raw_file_schemas[file_name]),
+        dtype=raw_file_schemas[file_name],
     )
     
     return temp_df
@@ -232,11 +433,13 @@ def backend_load_film_genre():
     file_name = "film_genre.csv"
     full_path = relative_path + file_name
     
-    # Read csv
+    # Read csv, only the needed columns with their dtype
     temp_df = pd.read_csv(
         filepath_or_buffer=full_path,
         sep=',',
-        header=0
+        header=0,
+        usecols=list(raw_file_schemas[file_name]),
+        dtype=raw_file_schemas[file_name],
     )
     
     return temp_df
@@ -247,16 +450,17 @@ def load_genre_hierarchy():
     file_name = "genre_hierarchie.csv"
     full_path = relative_path + file_name
     
-     # Read csv
+    # Read csv, only the needed columns with their dtype
     temp_df = pd.read_csv(
         filepath_or_buffer=full_path,
         sep=r'[";]',
         engine='python',
         header=0,
+        usecols=list(raw_file_schemas[file_name]),
+        dtype=raw_file_schemas[file_name],
     )
     
-    hierarchy_df = temp_df.drop(temp_df.columns[[0, -1]], axis=1)
-    hierarchy_df = hierarchy_df.fillna(value="")
+    hierarchy_df = temp_df.fillna(value="")
 
     return hierarchy_df
 
@@ -266,17 +470,99 @@ def backend_load_distinction():
     file_name = "distinction.csv"
     full_path = relative_path + file_name
 
-    # Read .csv
+    # Read .csv, only the needed columns with their dtype
     temp_df = pd.read_csv(
         filepath_or_buffer=full_path,
         sep=',',
         header=0,
+        usecols=list(raw_file_schemas[file_name]),
+        dtype=raw_file_schemas[file_name],
         parse_dates=True,
     )
 
     return temp_df
 
 
+def lookup_columns(left_df, right_df, left_on, right_on):
+    """
+    Adds to left_df the columns of right_df whose key right_on matches the key left_on of left_df.
+
+    Gives the same rows as a left pd.merge(), without the right_on column. The key of each row is
+    looked up in the index of right_on and the right columns are taken at these positions, so the
+    columns of left_df are not copied.
+
+    Parameters
+    ----------
+    left_df : pd.DataFrame()
+        The df to add the columns to
+    right_df : pd.DataFrame()
+        The dimension df to look up
+    left_on : str
+        The key column of left_df
+    right_on : str
+        The key column of right_df, expected to be unique
+
+    Raises
+    ------
+    -
+
+    Returns
+    -------
+    temp_df : pd.DataFrame()
+        The left_df with the columns of right_df
+
+    Sources
+    -------
+    https://pandas.pydata.org/docs/reference/api/pandas.Index.get_indexer.html
+
+    See Also
+    --------
+    drop_and_rename_columns
+    """
+
+    # A key found several times in right_df duplicates the left rows, only a merge does that
+    if not right_df[right_on].is_unique:
+        temp_df = pd.merge(
+            left=left_df,
+            right=right_df,
+            how="left",
+            left_on=left_on,
+            right_on=right_on,
+            suffixes=("", "")
+        )
+        if right_on != left_on:
+            temp_df = drop_and_rename_columns(df=temp_df, col_names_to_drop=[right_on])
+        return temp_df
+
+    # Position of the key of each left row in right_df, -1 if it is missing
+    positions = pd.Index(right_df[right_on]).get_indexer(left_df[left_on])
+
+    # Take the right columns at these positions, a missing key gives NaN as with a merge
+    data = {col_name: left_df[col_name] for col_name in left_df.columns}
+    for col_name in right_df.columns:
+        if col_name != right_on:
+            data[col_name] = pd.api.extensions.take(right_df[col_name].to_numpy(), positions, allow_fill=True)
+
+    # Do not copy, nor consolidate, the columns of left_df
+    temp_df = pd.DataFrame(data=data, index=left_df.index, copy=False)
+
+    return temp_df
+
+
+def drop_and_rename_columns(df, col_names_to_drop, new_col_names=None):
+    # Keep the other columns, renamed if needed
+    new_col_names = new_col_names or {}
+    data = {
+        new_col_names.get(col_name, col_name): df[col_name]
+        for col_name in df.columns if col_name not in col_names_to_drop
+    }
+
+    # Do not copy, nor consolidate, the kept columns, unlike df.drop() and df.rename()
+    temp_df = pd.DataFrame(data=data, index=df.index, copy=False)
+
+    return temp_df
+
+
 def merge_film_and_generic(film_df, generic_df):
     temp_df = pd.merge(
         left=film_df,
@@ -291,26 +577,22 @@ def merge_film_and_generic(film_df, generic_df):
 
 
 def merge_film_and_function(film_df, function_df):
-    temp_df = pd.merge(
-        left=film_df,
-        right=function_df,
-        how="left",
+    temp_df = lookup_columns(
+        left_df=film_df,
+        right_df=function_df,
         left_on="fonctionId",
         right_on="FonctionId",
-        suffixes=("", "")
     )
     
     return temp_df
 
 
 def merge_film_and_name(film_df, name_df):
-    temp_df = pd.merge(
-        left=film_df,
-        right=name_df,
-        how="left",
+    temp_df = lookup_columns(
+        left_df=film_df,
+        right_df=name_df,
         left_on="nomId",
         right_on="NomId",
-        suffixes=("", "")
     )
     
     return temp_df
@@ -330,13 +612,11 @@ def merge_film_and_film_language(film_df, film_language_df):
 
 
 def merge_film_and_language(film_df, language_df):
-    temp_df = pd.merge(
-        left=film_df,
-        right=language_df,
-        how="left",
+    temp_df = lookup_columns(
+        left_df=film_df,
+        right_df=language_df,
         left_on="langueId",
         right_on="LangueId",
-        suffixes=("", "")
     )
     
     return temp_df
@@ -356,26 +636,22 @@ def merge_film_and_film_country(film_df, film_country_df):
 
 
 def merge_film_and_country(film_df, country_df):
-    temp_df = pd.merge(
-        left=film_df,
-        right=country_df,
-        how="left",
+    temp_df = lookup_columns(
+        left_df=film_df,
+        right_df=country_df,
         left_on="paysId",
         right_on="PaysId",
-        suffixes=("", "")
     )
     
     return temp_df
 
 
 def merge_film_and_continent(film_df, continent_df):
-    temp_df = pd.merge(
-        left=film_df,
-        right=continent_df,
-        how="left",
+    temp_df = lookup_columns(
+        left_df=film_df,
+        right_df=continent_df,
         left_on="pays",
         right_on="pays",
-        suffixes=("", "")
     )
     
     return temp_df
@@ -395,39 +671,33 @@ def merge_film_and_film_genre_category(film_df, film_genre_category_df):
 
 
 def merge_film_and_genre_category_wiki(film_df, genre_category_wiki_df):
-    temp_df = pd.merge(
-        left=film_df,
-        right=genre_category_wiki_df,
-        how="left",
+    temp_df = lookup_columns(
+        left_df=film_df,
+        right_df=genre_category_wiki_df,
         left_on="sujetId",
         right_on="sujetId",
-        suffixes=("", "")
     )
     
     return temp_df
 
 
 def merge_film_and_film_genre(film_df, film_genre_df):
-    temp_df = pd.merge(
-        left=film_df,
-        right=film_genre_df,
-        how="left",
+    temp_df = lookup_columns(
+        left_df=film_df,
+        right_df=film_genre_df,
         left_on="lienWikidata",
         right_on="genre",
-        suffixes=("", "")
     )
     
     return temp_df
 
 
 def merge_film_and_genre_hierarchy(film_df, genre_hierearchy_df):
-    temp_df = pd.merge(
-        left=film_df,
-        right=genre_hierearchy_df,
-        how="left",
+    temp_df = lookup_columns(
+        left_df=film_df,
+        right_df=genre_hierearchy_df,
         left_on="genreLabel",
         right_on="data",
-        suffixes=("", "")
     )
     
     return temp_df
@@ -441,25 +711,22 @@ def clean_film_df_after_load(df):
 
 
 def clean_film_df_after_merge_generic(df):
-    # Drop 'organismeId' and 'filmoId'
-    temp_df = df.drop(columns=['organismeId', 'filmoId'])
+    # Drop 'filmoId'
+    temp_df = drop_and_rename_columns(df=df, col_names_to_drop=['filmoId'])
     
     return temp_df
 
 
 def clean_film_df_after_merge_function(df):
-    # Drop 'fonctionId' and 'FonctionId'
-    temp_df = df.drop(columns=['fonctionId', 'FonctionId'])
-    
-    # Rename 'terme' to 'fonction'
-    temp_df = temp_df.rename(columns={"terme": "fonction"})
+    # Drop 'fonctionId' and rename 'terme' to 'fonction'
+    temp_df = drop_and_rename_columns(df=df, col_names_to_drop=['fonctionId'], new_col_names={"terme": "fonction"})
     
     return temp_df
 
 
 def clean_film_df_after_merge_name(df):
-    # Drop 'nomId' and 'NomId'
-    temp_df = df.drop(columns=['nomId', 'NomId'])
+    # Drop 'nomId'
+    temp_df = drop_and_rename_columns(df=df, col_names_to_drop=['nomId'])
     
     # Add a combined first name and last name column
     temp_df['nomComplet'] = temp_df['prenom'] + " " + temp_df['nom']
@@ -469,34 +736,28 @@ def clean_film_df_after_merge_name(df):
 
 def clean_film_df_after_merge_film_language(df):
     # Drop 'filmoId' 
-    temp_df = df.drop(columns=['filmoId'])
+    temp_df = drop_and_rename_columns(df=df, col_names_to_drop=['filmoId'])
     
     return temp_df
 
 
 def clean_film_df_after_merge_language(df):
-    # Drop 'langueId' and 'LangueId' 
-    temp_df = df.drop(columns=['langueId', 'LangueId'])
-    
-    # Rename 'terme' to 'langue'
-    temp_df = temp_df.rename(columns={"terme": "langue"})
+    # Drop 'langueId' and rename 'terme' to 'langue'
+    temp_df = drop_and_rename_columns(df=df, col_names_to_drop=['langueId'], new_col_names={"terme": "langue"})
     
     return temp_df
 
 
 def clean_film_df_after_merge_film_country(df):
     # Drop 'filmoId' 
-    temp_df = df.drop(columns=['filmoId'])
+    temp_df = drop_and_rename_columns(df=df, col_names_to_drop=['filmoId'])
     
     return temp_df
 
 
 def clean_film_df_after_merge_country(df):
-    # Drop 'paysId' and 'PaysId' 
-    temp_df = df.drop(columns=['paysId', 'PaysId'])
-    
-    # Rename 'terme' to 'pays'
-    temp_df = temp_df.rename(columns={"terme": "pays"})
+    # Drop 'paysId' and rename 'terme' to 'pays'
+    temp_df = drop_and_rename_columns(df=df, col_names_to_drop=['paysId'], new_col_names={"terme": "pays"})
     
     return temp_df
 
@@ -509,32 +770,29 @@ def clean_film_df_after_merge_continent(df):
 
 
 def clean_film_df_after_merge_film_genre_category(df):
-    # Drop 'filmoId', 'FilmoGenresCategoriesID'
-    temp_df = df.drop(columns=['filmoId', 'FilmoGenresCategoriesID'])
+    # Drop 'filmoId'
+    temp_df = drop_and_rename_columns(df=df, col_names_to_drop=['filmoId'])
     
     return temp_df
 
 
 def clean_film_df_after_merge_genre_category_wiki(df):
-    # Drop 'sujetId' and 
-    temp_df = df.drop(columns=['sujetId'])
+    # Drop 'sujetId'
+    temp_df = drop_and_rename_columns(df=df, col_names_to_drop=['sujetId'])
     
     return temp_df
 
 
 def clean_film_df_after_merge_film_genre(df):
-    # Drop 'lienWikidata', 'genre'
-    temp_df = df.drop(columns=['lienWikidata', 'genre'])
+    # Drop 'lienWikidata'
+    temp_df = drop_and_rename_columns(df=df, col_names_to_drop=['lienWikidata'])
       
     return temp_df
 
 
 def clean_film_df_after_merge_genre_hierarchy(df):
-    # Drop 'data'
-    temp_df = df.drop(columns=['data'])
-    
     # Rename 'genreLabel', 'subgenre_0, subgenre_1'
-    temp_df = temp_df.rename(columns={
+    temp_df = drop_and_rename_columns(df=df, col_names_to_drop=[], new_col_names={
         "genreLabel": "genreIdentifiant",
         "subgenre_0": "sousGenre0",
         "subgenre_1": "sousGenre1"
@@ -544,8 +802,8 @@ def clean_film_df_after_merge_genre_hierarchy(df):
 
 
 def add_constant_column(df, col_name, const_name):
-    # Create a copy of the given df
-    temp_df = df.copy()
+    # Create a shallow copy of the given df, adding a column does not modify the others
+    temp_df = df.copy(deep=False)
     
     # Add the constant col with the given name
     temp_df[col_name] = const_name
@@ -560,14 +818,72 @@ def preprocess_film_genre(df):
     return temp_df
 
 
+def load_master_film_raw_dfs(max_workers=None):
+    """
+    Reads concurrently the raw files joined by create_master_film_df().
+
+    The files are independent of each other and the csv parser releases the GIL, so the reading
+    time is about the one of the slowest file on a multi-core machine.
+
+    Parameters
+    ----------
+    max_workers : int
+        The number of threads, default is the one of concurrent.futures.ThreadPoolExecutor
+
+    Raises
+    ------
+    -
+
+    Returns
+    -------
+    raw_dfs : dict()
+        The raw df of each file, by the name used in create_master_film_df()
+
+    Sources
+    -------
+    https://docs.python.org/3/library/concurrent.futures.html#threadpoolexecutor
+
+    See Also
+    --------
+    create_master_film_df
+    """
+
+    # Loader of each raw file
+    loaders = {
+        'film': backend_load_film,
+        'generic': backend_load_generic,
+        'function': backend_load_function,
+        'name': backend_load_name,
+        'film_language': backend_load_film_language,
+        'language': backend_load_language,
+        'film_country': backend_load_film_country,
+        'country': backend_load_country,
+        'continent': backend_load_continent,
+        'film_genre_category': backend_load_film_genre_category,
+        'genre_category_wiki': backend_load_genre_category_wiki,
+        'film_genre': backend_load_film_genre,
+        'genre_hierarchy': load_genre_hierarchy,
+    }
+
+    # Read all the files at once, an exception raised by a loader is raised here
+    with concurrent.futures.ThreadPoolExecutor(max_workers=max_workers) as executor:
+        futures = {name: executor.submit(loader) for name, loader in loaders.items()}
+    raw_dfs = {name: future.result() for name, future in futures.items()}
+
+    return raw_dfs
+
+
 def create_master_film_df():
-    # Load film_df
-    film_df = backend_load_film()
+    # Load all the raw files concurrently
+    raw_dfs = load_master_film_raw_dfs()
+
+    # Get film_df
+    film_df = raw_dfs.pop('film')
     # Clean film_df
     film_df = clean_film_df_after_load(df=film_df)
 
-    # Load generic_df
-    generic_df = backend_load_generic()
+    # Get generic_df
+    generic_df = raw_dfs.pop('generic')
     # Merge film_df and generic_df
     film_df = merge_film_and_generic(film_df=film_df, generic_df=generic_df)
     # Clean film_df after merge with generic_df
@@ -575,8 +891,8 @@ def create_master_film_df():
     # Clear memory space
     del generic_df
 
-    # Load function_df
-    function_df = backend_load_function()
+    # Get function_df
+    function_df = raw_dfs.pop('function')
     # Merge film_df and function_df
     film_df = merge_film_and_function(film_df=film_df, function_df=function_df)
     # Clean film_df after merge with function_df
@@ -584,8 +900,8 @@ def create_master_film_df():
     # Clear memory space
     del function_df
 
-    # Load name_df
-    name_df = backend_load_name()
+    # Get name_df
+    name_df = raw_dfs.pop('name')
     # Merge film_df and name_df
     film_df = merge_film_and_name(film_df=film_df, name_df=name_df)
     # Clean film_df after merge with name_df
@@ -593,8 +909,8 @@ def create_master_film_df():
     # Clear memory space
     del name_df
 
-    # Load film_language_df
-    film_language_df = backend_load_film_language()
+    # Get film_language_df
+    film_language_df = raw_dfs.pop('film_language')
     # Merge film_df and film_langue_df
     film_df = merge_film_and_film_language(film_df=film_df, film_language_df=film_language_df)
     # Clean film_df after merge with film_langue_df
@@ -602,8 +918,8 @@ def create_master_film_df():
     # Clear memory space
     del film_language_df
 
-    # Load language_df
-    language_df = backend_load_language()
+    # Get language_df
+    language_df = raw_dfs.pop('language')
     # Merge film_df and language_df
     film_df = merge_film_and_language(film_df=film_df, language_df=language_df)
     # Clean film_df after merge with language_df
@@ -611,8 +927,8 @@ def create_master_film_df():
     # Clear memory space
     del language_df
 
-    # Load film_country_df
-    film_country_df = backend_load_film_country()
+    # Get film_country_df
+    film_country_df = raw_dfs.pop('film_country')
     # Merge film_df and film_pays_df
     film_df = merge_film_and_film_country(film_df=film_df, film_country_df=film_country_df)
     # Clean film_df after merge with film_country_df
@@ -620,8 +936,8 @@ def create_master_film_df():
     # Clear memory space
     del film_country_df
 
-    # Load country_df
-    country_df = backend_load_country()
+    # Get country_df
+    country_df = raw_dfs.pop('country')
     # Merge film_df and film_pays_df
     film_df = merge_film_and_country(film_df=film_df, country_df=country_df)
     # Clean film_df after merge with country_df
@@ -629,8 +945,8 @@ def create_master_film_df():
     # Clear memory space
     del country_df
 
-    # Load continent_df
-    continent_df = backend_load_continent()
+    # Get continent_df
+    continent_df = raw_dfs.pop('continent')
     # Merge film_df and film_pays_df
     film_df = merge_film_and_continent(film_df=film_df, continent_df=continent_df)
     # Clean film_df after merge with continent_df
@@ -641,8 +957,8 @@ def create_master_film_df():
     # Add planete column
     film_df = add_constant_column(df=film_df, col_name='planete', const_name='Terre')
 
-    # Load film_genre_category_df
-    film_genre_category_df = backend_load_film_genre_category()
+    # Get film_genre_category_df
+    film_genre_category_df = raw_dfs.pop('film_genre_category')
     # Merge film_df and film_genre_category_df
     film_df = merge_film_and_film_genre_category(film_df=film_df, film_genre_category_df=film_genre_category_df)
     # Clean film_df after merge with film_genre_category_df
@@ -650,8 +966,8 @@ def create_master_film_df():
     # Clear memory space
     del film_genre_category_df
 
-    # Load genre_category_wiki_df
-    genre_category_wiki_df = backend_load_genre_category_wiki()
+    # Get genre_category_wiki_df
+    genre_category_wiki_df = raw_dfs.pop('genre_category_wiki')
     # Merge film_df and genre_category_wiki_df
     film_df = merge_film_and_genre_category_wiki(film_df=film_df, genre_category_wiki_df=genre_category_wiki_df)
     # Clean film_df after merge with genre_category_wiki_df
@@ -659,8 +975,8 @@ def create_master_film_df():
     # Clear memory space
     del genre_category_wiki_df
 
-    # Load film_genre_df
-    film_genre_df = backend_load_film_genre()
+    # Get film_genre_df
+    film_genre_df = raw_dfs.pop('film_genre')
     # Preprocess film_genre_df
     film_genre_df = preprocess_film_genre(df=film_genre_df)
     # Merge film_df and film_genre_df
@@ -670,8 +986,8 @@ def create_master_film_df():
     # Clear memory space
     del film_genre_df
 
-    # Load genre_hierearchy_df
-    genre_hierearchy_df = load_genre_hierarchy()
+    # Get genre_hierearchy_df
+    genre_hierearchy_df = raw_dfs.pop('genre_hierarchy')
     # Merge film_df and genre_hierearchy_df
     film_df = merge_film_and_genre_hierarchy(film_df=film_df, genre_hierearchy_df=genre_hierearchy_df)
     # Clean film_df after merge with genre_hierearchy_df
@@ -684,29 +1000,25 @@ def create_master_film_df():
 
 def clean_film_df_columns(raw_film_df):
 
-    # Explicit copy 
-    temp_df = raw_film_df.copy()
-
-    # clean str columns
-    temp_df = preprocess_vsCommon.clean_str_column(df=temp_df, col_name='titreOriginal')
-    temp_df = preprocess_vsCommon.clean_str_column(df=temp_df, col_name='fonction')
-    temp_df = preprocess_vsCommon.clean_str_column(df=temp_df, col_name='nom')
-    temp_df = preprocess_vsCommon.clean_str_column(df=temp_df, col_name='prenom')
-    temp_df = preprocess_vsCommon.clean_str_column(df=temp_df, col_name='nomComplet')
-    temp_df = preprocess_vsCommon.clean_str_column(df=temp_df, col_name='langue')
-    temp_df = preprocess_vsCommon.clean_str_column(df=temp_df, col_name='pays')
-    temp_df = preprocess_vsCommon.clean_str_column(df=temp_df, col_name='continent')
-    temp_df = preprocess_vsCommon.clean_str_column(df=temp_df, col_name='capitale')
-    temp_df = preprocess_vsCommon.clean_str_column(df=temp_df, col_name='planete')
-    temp_df = preprocess_vsCommon.clean_str_column(df=temp_df, col_name='genreIdentifiant')
-    temp_df = preprocess_vsCommon.clean_str_column(df=temp_df, col_name='genre')
-    temp_df = preprocess_vsCommon.clean_str_column(df=temp_df, col_name='sousGenre0')
-    temp_df = preprocess_vsCommon.clean_str_column(df=temp_df, col_name='sousGenre1')
-    
-    # capitalize 
-    temp_df = preprocess_vsCommon.capitalize_first_letter_all_words(df=temp_df, col_name='titreOriginal')
-    temp_df = preprocess_vsCommon.capitalize_first_letter_all_words(df=temp_df, col_name='sousGenre0')
-    temp_df = preprocess_vsCommon.capitalize_first_letter_all_words(df=temp_df, col_name='sousGenre1')
+    clean_str = preprocess_vsCommon.clean_str
+
+    # Clean str columns, then capitalize the titles and the sub genres, in a single pass
+    temp_df = preprocess_vsCommon.normalize_string_columns(df=raw_film_df, spec={
+        'titreOriginal': [clean_str, str.title],
+        'fonction': [clean_str],
+        'nom': [clean_str],
+        'prenom': [clean_str],
+        'nomComplet': [clean_str],
+        'langue': [clean_str],
+        'pays': [clean_str],
+        'continent': [clean_str],
+        'capitale': [clean_str],
+        'planete': [clean_str],
+        'genreIdentifiant': [clean_str],
+        'genre': [clean_str],
+        'sousGenre0': [clean_str, str.title],
+        'sousGenre1': [clean_str, str.title],
+    })
     
     return temp_df
 
@@ -725,16 +1037,226 @@ def create_file_from_df(df, file_name):
     return
 
 
-def load_preprocessed_file(file_name):
+def normalize_preprocessed_df(df, file_name):
+    # Get the schema of the file
+    schema = preprocessed_file_schemas[file_name]
+    columns = schema['columns']
+
+    # Select the columns, in order
+    temp_df = df[list(columns)].reset_index(drop=True)
+
+    # Set missing values
+    for col_name, dtype in columns.items():
+        if dtype in ('object', 'category'):
+            temp_df[col_name] = temp_df[col_name].replace("", np.nan)
+    for col_name in schema['fill_na']:
+        temp_df[col_name] = temp_df[col_name].fillna("n.d.")
+
+    # Clean str columns
+    for col_name in schema['title']:
+        temp_df[col_name] = temp_df[col_name].str.title()
+    for col_name in schema['fix_sf']:
+        temp_df[col_name] = temp_df[col_name].replace(['Sf'], 'SF')
+
+    # Set type
+    temp_df = temp_df.astype(columns)
+
+    return temp_df
+
+
+def create_preprocessed_file_from_df(df, file_name):
     # Set file path and name
-    file_name = file_name
-    full_path = relative_path + file_name 
+    full_path = relative_path + file_name
 
-    # Read .csv
-    temp_df = pd.read_csv(
-        filepath_or_buffer=full_path,
-        sep=',',
-        header=0
+    # Normalize once, so that the app reads the file as is
+    temp_df = normalize_preprocessed_df(df=df, file_name=file_name)
+
+    # Write feather in a single uncompressed chunk, so that it can be memory mapped as is
+    temp_df.to_feather(
+        path=full_path,
+        compression='uncompressed',
+        chunksize=max(len(temp_df), 1),
+    )
+
+    return
+
+
+def compute_file_hash(file_name):
+    # Set file path and name
+    full_path = relative_path + file_name
+
+    # Hash the content by chunks
+    sha256 = hashlib.sha256()
+    with open(full_path, 'rb') as file:
+        for chunk in iter(lambda: file.read(1024 * 1024), b''):
+            sha256.update(chunk)
+
+    return sha256.hexdigest()
+
+
+def create_manifest_file(step_fingerprints):
+    # Set file path and name
+    full_path = relative_path + manifest_file_name
+
+    # The raw files that are not deployed keep the hash of the build that used them
+    previous_input_hashes = {}
+    if os.path.isfile(full_path):
+        previous_input_hashes = load_manifest_file()['inputs']
+    input_hashes = {
+        file_name: compute_file_hash(file_name) if os.path.isfile(relative_path + file_name) else previous_input_hashes.get(file_name)
+        for file_name in raw_file_names
+    }
+
+    # Hash the raw files and the preprocessed files, and keep the build fingerprints
+    manifest = {
+        'creationDate': datetime.datetime.now().isoformat(timespec='seconds'),
+        'inputs': {file_name: file_hash for file_name, file_hash in input_hashes.items() if file_hash is not None},
+        'artifacts': {
+            file_name: compute_file_hash(file_name)
+            for file_name in preprocessed_file_names if os.path.isfile(relative_path + file_name)
+        },
+        'steps': step_fingerprints,
+    }
+
+    # Write json
+    with open(full_path, 'w', encoding='utf-8') as file:
+        json.dump(manifest, file, indent=4, sort_keys=True)
+
+    return manifest
+
+
+def load_manifest_file():
+    # Set file path and name
+    full_path = relative_path + manifest_file_name
+
+    # Read json
+    with open(full_path, 'r', encoding='utf-8') as file:
+        manifest = json.load(file)
+
+    return manifest
+
+
+def compute_preprocessed_files_hash():
+    # Use the hashes recorded by the build, or hash the files if they were not built
+    if os.path.isfile(relative_path + manifest_file_name):
+        artifact_hashes = load_manifest_file()['artifacts']
+    else:
+        artifact_hashes = {
+            file_name: compute_file_hash(file_name)
+            for file_name in preprocessed_file_names if os.path.isfile(relative_path + file_name)
+        }
+
+    return hashlib.sha256(json.dumps(artifact_hashes, sort_keys=True).encode('utf-8')).hexdigest()
+
+
+def check_preprocessed_files():
+    """
+    Checks that the preprocessed files exist and match the manifest written by the build,
+    i.e. by running preprocess_vsHeroku.py. The check never rebuilds anything.
+
+    Parameters
+    ----------
+    -
+
+    Raises
+    ------
+    FileNotFoundError
+        If a preprocessed file is missing. The app cannot start without it, unless it is one of
+        optional_preprocessed_file_names.
+
+    Returns
+    -------
+    is_up_to_date : bool
+        False if a warning has been emitted because the files are stale or unverifiable
+
+    Sources
+    -------
+    -
+
+    See Also
+    --------
+    preprocess_vsHeroku.create_data_files
+    """
+
+    # Refuse to start if a required artifact is missing
+    missing_file_names = [
+        file_name for file_name in preprocessed_file_names
+        if not os.path.isfile(relative_path + file_name) and file_name not in optional_preprocessed_file_names
+    ]
+    if missing_file_names:
+        raise FileNotFoundError(
+            "Missing preprocessed file(s) " + ", ".join(missing_file_names) +
+            ". Run 'python Src/preprocess_vsHeroku.py' to build them."
+        )
+
+    # Warn if the artifacts were not produced by the build
+    if not os.path.isfile(relative_path + manifest_file_name):
+        warnings.warn(
+            "No " + manifest_file_name + " found, the preprocessed files cannot be verified. "
+            "Run 'python Src/preprocess_vsHeroku.py' to build them."
+        )
+        return False
+    manifest = load_manifest_file()
+
+    # Raw files that are not deployed with the app cannot be compared
+    stale_file_names = [
+        file_name for file_name, file_hash in manifest['inputs'].items()
+        if os.path.isfile(relative_path + file_name) and compute_file_hash(file_name) != file_hash
+    ]
+    stale_file_names += [
+        file_name for file_name in preprocessed_file_names
+        if os.path.isfile(relative_path + file_name) and manifest['artifacts'].get(file_name) != compute_file_hash(file_name)
+    ]
+    if stale_file_names:
+        warnings.warn(
+            "The preprocessed files are stale, " + ", ".join(stale_file_names) +
+            " changed since the last build. Run 'python Src/preprocess_vsHeroku.py' to rebuild them."
+        )
+        return False
+
+    return True
+
+
+def convert_arrow_column_to_pandas(column, dtype):
+    # A single chunk is expected, see create_preprocessed_file_from_df()
+    array = column.chunk(0) if column.num_chunks == 1 else column.combine_chunks()
+
+    # The codes of categorical columns reference the memory mapped file
+    if dtype == 'category':
+        codes = array.indices.to_numpy(zero_copy_only=False)
+        if array.null_count > 0:
+            codes = np.where(array.is_null().to_numpy(zero_copy_only=False), -1, codes)
+        return pd.Categorical.from_codes(codes=codes, categories=pd.Index(array.dictionary.to_pandas()))
+
+    # The values of integer columns reference the memory mapped file, only the mask is allocated
+    if dtype == 'Int64':
+        if array.null_count == 0:
+            values = array.to_numpy(zero_copy_only=False)
+        else:
+            values = np.frombuffer(array.buffers()[1], dtype=np.int64, count=len(array), offset=array.offset * 8)
+        mask = array.is_null().to_numpy(zero_copy_only=False)
+        return pd.arrays.IntegerArray(values, mask)
+
+    # Strings and dates are converted
+    return array.to_pandas()
+
+
+def load_preprocessed_file(file_name, columns=None):
+    # Set file path and name
+    full_path = relative_path + file_name
+
+    # Get the schema of the file
+    dtypes = preprocessed_file_schemas[file_name]['columns']
+    if columns is None:
+        columns = list(dtypes)
+
+    # Memory map the feather file, the pages of the file are shared by all the processes reading it
+    table = feather.read_table(full_path, columns=columns, memory_map=True)
+
+    # Wrap the buffers in a df without copying them, the file is already normalized and typed
+    temp_df = pd.DataFrame(
+        data={col_name: convert_arrow_column_to_pandas(column=table.column(col_name), dtype=dtypes[col_name]) for col_name in columns},
+        copy=False,
     )
 
     return temp_df
@@ -780,177 +1302,39 @@ def load_master_film_file():
 
 
 def load_preprocessed_avg_file():
-    # Set file path and name
-    file_name = "p_avg.csv"
-    full_path = relative_path + file_name 
-
-    # Read .csv
-    temp_df = pd.read_csv(
-        filepath_or_buffer=full_path,
-        sep=',',
-        header=0,
-        dtype={
-            'genre': str,
-            'moyenne': float,
-        }
-    )
-
-    # Set type
-    temp_df['genre'] = temp_df['genre'].fillna("n.d.")
-    temp_df['genre'] = temp_df['genre'].replace(['Sf'],'SF')
-    return temp_df
+    return load_preprocessed_file(file_name="p_avg.feather")
 
 
 def load_preprocessed_distinction_file():
-    # Set file path and name
-    file_name = "p_distinction.csv"
-    full_path = relative_path + file_name 
-
-    # Read .csv
-    temp_df = pd.read_csv(
-        filepath_or_buffer=full_path,
-        sep=',',
-        header=0,
-        parse_dates=['date'],
-        dtype={
-            'nomComplet': str,
-            'distinction': str,
-            'date': str,
-            'annee': 'Int64'
-        }
-    )
-
-    return temp_df
+    return load_preprocessed_file(file_name="p_distinction.feather")
 
 
 def load_preprocessed_bumpchart_file():
-    # Set file path and name
-    file_name = "p_bumpchart.csv"
-    full_path = relative_path + file_name 
-
-    # Read .csv
-    temp_df = pd.read_csv(
-        filepath_or_buffer=full_path,
-        sep=',',
-        header=0,
-        dtype={
-            'decennie': 'Int64',
-            'genre': str,
-            'compte': 'Int64',
-            'rang': 'Int64',
-        }
-    )
-
-    # Set type
-    temp_df['genre'] = temp_df['genre'].fillna("n.d.")
-    temp_df['genre'] = temp_df['genre'].replace(['Sf'],'SF')
-    return temp_df
+    return load_preprocessed_file(file_name="p_bumpchart.feather")
 
 
 def load_preprocessed_h_barchart_file():
-    # Set file path and name
-    file_name = "p_h_barchart.csv"
-    full_path = relative_path + file_name 
+    return load_preprocessed_file(file_name="p_h_barchart.feather")
 
-    # Read .csv
-    temp_df = pd.read_csv(
-        filepath_or_buffer=full_path,
-        sep=',',
-        header=0,
-        dtype={
-            'nomComplet': str,
-            'genre': str,
-            'nombreDeFilms': 'Int64',
-        }
-    )
 
-    # Set type
-    temp_df['nomComplet'] = temp_df['nomComplet'].fillna("n.d.")
-    temp_df['nomComplet'] = temp_df['nomComplet'].str.title()
-    temp_df['genre'] = temp_df['genre'].fillna("n.d.")
-    return temp_df
+def load_preprocessed_h_barchart_decade_file():
+    # Optional file, None until it is built
+    if not os.path.isfile(relative_path + "p_h_barchart_decade.feather"):
+        return None
+    return load_preprocessed_file(file_name="p_h_barchart_decade.feather")
 
 
 def load_preprocessed_sunburst_file():
-    # Set file path and name
-    file_name = "p_sunburst.csv"
-    full_path = relative_path + file_name 
-
-    # Read .csv
-    temp_df = pd.read_csv(
-        filepath_or_buffer=full_path,
-        sep=',',
-        header=0,
-        dtype={
-            'titreOriginal': str,
-            'genre': str,
-            'sousGenre0': str,
-            'sousGenre1': str,
-        }
-    )
-
-    # Set type
-    temp_df['titreOriginal'] = temp_df['titreOriginal'].fillna("n.d.")
-    temp_df['genre'] = temp_df['genre'].fillna("n.d.")
-    temp_df['sousGenre0'] = temp_df['sousGenre0'].fillna("n.d.")
-    temp_df['sousGenre1'] = temp_df['sousGenre1'].fillna("n.d.")
-    temp_df['genre'] = temp_df['genre'].replace(['Sf'],'SF')
-    return temp_df
+    return load_preprocessed_file(file_name="p_sunburst.feather")
 
 
 def load_preprocessed_table_file():
-    # Set file path and name
-    file_name = "p_table.csv"
-    full_path = relative_path + file_name 
-
-    # Read .csv
-    temp_df = pd.read_csv(
-        filepath_or_buffer=full_path,
-        sep=',',
-        header=0,
-        dtype={
-            'titreOriginal': str,
-            'anneeSortie': 'Int64',
-            'langue': str,
-            'genre': str,
-        }
-    )
-
-    # Set type
-    temp_df['titreOriginal'] = temp_df['titreOriginal'].fillna("n.d.")
-    temp_df['langue'] = temp_df['langue'].fillna("n.d.")
-    temp_df['genre'] = temp_df['genre'].fillna("n.d.")
-
-    temp_df['genre'] = temp_df['genre'].replace(['Sf'],'SF')
-    return temp_df
+    return load_preprocessed_file(file_name="p_table.feather")
 
 
 def load_preprocessed_treemap_file():
-    # Set file path and name
-    file_name = "p_treemap.csv"
-    full_path = relative_path + file_name 
-
-    # Read .csv
-    temp_df = pd.read_csv(
-        filepath_or_buffer=full_path,
-        sep=',',
-        header=0,
-        dtype={
-            'titreOriginal': str,
-            'anneeSortie': 'Int64',
-            'planete': str,
-            'continent': str,
-            'pays':str,
-            'genre':str,
-        }
+    # The titles are not used by the treemap
+    return load_preprocessed_file(
+        file_name="p_treemap.feather",
+        columns=['anneeSortie', 'planete', 'continent', 'pays', 'genre'],
     )
-
-    # Set type
-    temp_df['titreOriginal'] = temp_df['titreOriginal'].fillna("n.d.")
-    temp_df['planete'] = temp_df['planete'].fillna("n.d.")
-    temp_df['continent'] = temp_df['continent'].fillna("n.d.")
-    temp_df['pays'] = temp_df['pays'].fillna("n.d.")
-    temp_df['genre'] = temp_df['genre'].fillna("n.d.")
-
-    temp_df['genre'] = temp_df['genre'].replace(['Sf'],'SF')
-    return temp_df
\ No newline at end of file
@@ -23,9 +23,6 @@ def clean_distinction_df(raw_distinction_df):
     # Drop error on line 1176
     temp_df = raw_distinction_df.drop([1176])
     
-    # Drop unnecessary columns
-    temp_df = temp_df.drop(columns=['person'])
-    
     # Rename columns
     temp_df = temp_df.rename(
         columns={
@@ -52,7 +49,7 @@ def clean_distinction_df(raw_distinction_df):
 def clean_distinction_df_for_barchart(distinction_df):
     
     # Get number of dinstinctions / person
-    temp_df = distinction_df.groupby("nomComplet")["date"].count()
+    temp_df = distinction_df.groupby("nomComplet", observed=True)["date"].count().sort_index()
 
     # Drop person with less than 5 distinction - they are not cool enough
     temp_df = temp_df.loc[temp_df >= 5]
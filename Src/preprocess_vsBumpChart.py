@@ -90,19 +90,15 @@ def clean_film_df_for_bumpchart(film_df):
     return temp_df
 
 
-def add_decade_column_for_bumpchart(df):
+def add_decade_column_for_bumpchart(df, bucket_width=10, origin=1900):
     
-    # Order film
-    temp_df = df.sort_values(by="anneeSortie")
-
-    # Create decades
-    decades = np.arange(1900, 2019+(10-(2019%10)+1), 10)
+    # Explicit copy
+    temp_df = df.copy()
 
-    # Add a 'decade' column
-    for decade in decades:
-        temp_df.loc[(temp_df['anneeSortie'] > decade) & (temp_df['anneeSortie'] <= (decade+10)), 'decennie'] = decade+10
+    # Add a 'decade' column: a year in ]start, start + bucket_width] gets start + bucket_width, start being origin + k * bucket_width
+    temp_df['decennie'] = origin + bucket_width * ((temp_df['anneeSortie'] - origin - 1) // bucket_width + 1)
 
-    # Set dtype for 'decennie'
+    # Set dtype for 'decennie'
     temp_df['decennie'] = temp_df['decennie'].astype(int)
 
     return temp_df
@@ -117,30 +113,25 @@ def create_genre_rank_for_bumpchart(df):
         .reset_index(name="compte")
     )
 
-    # Sort each decade
+    # Sort each decade, the stable sort keeps the genre order for equal counts
     temp_df = (temp_df
-        .groupby(['decennie'])
-        .apply(lambda x: x.sort_values(["compte"], ascending=False))
+        .sort_values(by=['decennie', 'compte'], ascending=[True, False], kind='mergesort')
         .reset_index(drop=True)
     )
 
-    # Add a rank column
-    temp_df["rang"] = (temp_df
-        .groupby('decennie')["compte"]
-        .rank(method="first", ascending=False)
-    )
+    # Add a rank column, the position in the sorted decade
+    temp_df["rang"] = temp_df.groupby('decennie').cumcount() + 1
     
     # Cast rank to int
     temp_df["rang"] = temp_df["rang"].astype(int)
-    #temp_df.rang = temp_df.rang.astype(int)
 
     return temp_df
 
 
-def prepare_data_for_bumpchart(raw_bumpchart_df):
+def prepare_data_for_bumpchart(raw_bumpchart_df, bucket_width=10):
 
-    # Add decade
-    temp_df = add_decade_column_for_bumpchart(df=raw_bumpchart_df)   
+    # Add decade, or period of bucket_width years
+    temp_df = add_decade_column_for_bumpchart(df=raw_bumpchart_df, bucket_width=bucket_width)   
 
     # Create rank
     temp_df = create_genre_rank_for_bumpchart(df=temp_df) 
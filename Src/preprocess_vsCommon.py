@@ -55,18 +55,78 @@ def capitalize_all_letter_all_words(df, col_name):
     return temp_df
 
 
+def clean_str(x):
+    if isinstance(x, str):
+        return str.capitalize(x)
+    else:
+        return str("")
+
+
 def clean_str_column(df, col_name):
     
     # Make a local copy
     temp_df = df.copy()
 
-    temp_df[col_name] = (temp_df[col_name]
-        .apply(lambda x: str.capitalize(x) if isinstance(x, str) else str(""))
-    )
+    temp_df[col_name] = temp_df[col_name].apply(clean_str)
     
     return temp_df
 
 
+def normalize_string_columns(df, spec):
+    """
+    Applies to several str columns of a given df their functions, e.g. clean_str then str.title
+
+    Each function is called once per distinct value of a column, not once per row: the column is
+    factorized, its distinct values are transformed and the result is taken back by code. The
+    columns that are not in spec are not copied.
+
+    Parameters
+    ----------
+    df : pd.DataFrame()
+        The df to normalize
+    spec : dict()
+        The functions to apply, in order, to each column, e.g. {'genre': [clean_str]}
+
+    Raises
+    ------
+    -
+
+    Returns
+    -------
+    temp_df : pd.DataFrame()
+        The df with the normalized columns
+
+    Sources
+    -------
+    https://pandas.pydata.org/docs/reference/api/pandas.factorize.html
+
+    See Also
+    --------
+    clean_str_column
+    """
+
+    data = {col_name: df[col_name] for col_name in df.columns}
+    for col_name, functions in spec.items():
+        # Code of each row, missing values get -1
+        codes, uniques = pd.factorize(df[col_name])
+        values = list(uniques)
+
+        # Missing values are transformed as well, as the last value so that the code -1 takes it
+        if (codes == -1).any():
+            values.append(np.nan)
+
+        # Transform each distinct value
+        for function in functions:
+            values = [function(x) for x in values]
+
+        data[col_name] = np.array(values, dtype=object).take(codes)
+
+    # Do not copy, nor consolidate, the columns that are not normalized
+    temp_df = pd.DataFrame(data=data, index=df.index, copy=False)
+
+    return temp_df
+
+
 def replace_str_containing_str(df, column_name, search_str, new_str, contain_word):
     '''
     Si contain_word = True: 
@@ -169,11 +229,323 @@ def get_list_of_genres(df):
     -
     """
     
-    genres = list(set(df['genre'].values))
+    # In order of appearance, so that every process lists them in the same order
+    genres = list(pd.unique(df['genre'].values))
     
     return genres
 
 
+def create_count_cube(df, dim_col_names, count_col_name):
+    """
+    Counts the rows of a given df by genre, year and dimension, e.g. country, cumulated along the years
+
+    The count of a [from_year, to_year] period is the difference of two cumulated counts, see
+    query_count_cube(), whatever the number of rows of df.
+
+    Parameters
+    ----------
+    df : pd.DataFrame()
+        The df with the columns genre, anneeSortie and the dimension columns
+    dim_col_names : list()
+        The dimension columns, i.e. the groupby keys of the query
+    count_col_name : str
+        The column whose non missing values are counted, as pd.NamedAgg(aggfunc='count')
+
+    Raises
+    ------
+    -
+
+    Returns
+    -------
+    cube : dict()
+        genres : pd.Index() of the genres, the layer of a genre is its position
+        years : np.array() of the sorted years
+        dims : pd.Index() of the dimension values, sorted as groupby().sort_index()
+        counts : np.array() of shape (genres + 2, years + 1, dims), counts[layer, i] being the count of the
+                 years before years[i]. The 2 last layers are the rows without genre and all the rows
+
+    Sources
+    -------
+    -
+
+    See Also
+    --------
+    query_count_cube
+    """
+
+    # Rows counted by a query: a year, the dimensions and the counted column are known
+    temp_df = df.dropna(subset=list(dict.fromkeys(['anneeSortie', count_col_name] + dim_col_names)))
+
+    # Layer of each row, the rows without genre are only counted by the 'All' layer
+    genre_codes, genres = pd.factorize(temp_df['genre'])
+    genre_codes = np.where(genre_codes == -1, len(genres), genre_codes)
+
+    # Position of each row on the year axis
+    year_codes, years = pd.factorize(temp_df['anneeSortie'].to_numpy(dtype='int64'), sort=True)
+
+    # Position of each row on the dimension axis, in the order of groupby().sort_index()
+    grouped = temp_df.groupby(dim_col_names, observed=True)
+    group_codes = grouped.ngroup().to_numpy()
+    sorted_groups = pd.Series(np.arange(grouped.ngroups), index=grouped.size().index).sort_index()
+    dim_positions = np.empty(len(sorted_groups), dtype='int64')
+    dim_positions[sorted_groups.to_numpy()] = np.arange(len(sorted_groups))
+    dim_codes = dim_positions[group_codes]
+
+    # Count the rows, then cumulate along the years with a 0 first so that counts[:, i] is the count before years[i]
+    counts = np.zeros((len(genres) + 2, len(years) + 1, len(sorted_groups)), dtype='int32')
+    np.add.at(counts, (genre_codes, year_codes + 1, dim_codes), 1)
+    counts[-1] = counts[:-1].sum(axis=0)
+    counts = counts.cumsum(axis=1, dtype='int32')
+
+    cube = {
+        'genres': pd.Index(genres),
+        'years': years,
+        'dims': sorted_groups.index,
+        'counts': counts,
+    }
+
+    return cube
+
+
+def query_count_cube(cube, genre, from_year, to_year, count_col_name):
+    """
+    Gets the count of each dimension value for a genre, or 'All', between from_year and to_year included
+
+    Gives the same result as filtering the df on the genre and the years, then
+    groupby(dim_col_names, observed=True).agg(count).sort_index().reset_index()
+
+    Parameters
+    ----------
+    cube : dict()
+        The cube created by create_count_cube()
+    genre : str
+        The genre, 'All' for all the genres
+    from_year : int
+        The first year
+    to_year : int
+        The last year
+    count_col_name : str
+        The name of the count column
+
+    Raises
+    ------
+    -
+
+    Returns
+    -------
+    temp_df : pd.DataFrame()
+        The dimension columns and the count column, only for the counts > 0
+
+    Sources
+    -------
+    -
+
+    See Also
+    --------
+    create_count_cube
+    """
+
+    # Position of the years, from_year > to_year gives an empty period
+    start = np.searchsorted(cube['years'], from_year, side='left')
+    end = max(np.searchsorted(cube['years'], to_year, side='right'), start)
+
+    # Count of the period for each dimension value, an unknown genre has no row
+    if genre == "All":
+        layer = -1
+    elif genre in cube['genres']:
+        layer = cube['genres'].get_loc(genre)
+    else:
+        layer = None
+    if layer is None:
+        counts = np.zeros(len(cube['dims']), dtype='int64')
+    else:
+        counts = cube['counts'][layer, end].astype('int64') - cube['counts'][layer, start]
+
+    # Keep the dimension values found in the period
+    is_found = counts > 0
+    temp_df = cube['dims'][is_found].to_frame(index=False)
+    temp_df[count_col_name] = counts[is_found]
+
+    return temp_df
+
+
+def create_compact_count_cube(cube):
+    """
+    Converts a count cube to the compact form sent to the browser, i.e. the non zero counts of each year
+
+    The browser sums the counts of a period, see Assets/count_cube.js, which gives the same
+    counts as query_count_cube().
+
+    Parameters
+    ----------
+    cube : dict()
+        The cube created by create_count_cube()
+
+    Raises
+    ------
+    -
+
+    Returns
+    -------
+    compact_cube : dict()
+        genres : list() of the genres
+        years : list() of the sorted years
+        dims : dict() of the dimension columns, as lists in the order of the cube
+        layers, yearPositions, dimPositions, counts : list() of the non zero counts and of their position
+        in the cube, the layer of the rows without genre is len(genres) and 'All' is the sum of the layers
+
+    Sources
+    -------
+    -
+
+    See Also
+    --------
+    create_count_cube
+    """
+
+    # Undo the cumulative sum, 'All' is computed by the browser
+    counts = np.diff(cube['counts'][:-1], axis=1)
+    layers, year_positions, dim_positions = np.nonzero(counts)
+
+    compact_cube = {
+        'genres': cube['genres'].astype(object).tolist(),
+        'years': cube['years'].tolist(),
+        'dims': {
+            col_name: temp_series.astype(object).tolist()
+            for col_name, temp_series in cube['dims'].to_frame(index=False).items()
+        },
+        'layers': layers.tolist(),
+        'yearPositions': year_positions.tolist(),
+        'dimPositions': dim_positions.tolist(),
+        'counts': counts[layers, year_positions, dim_positions].tolist(),
+    }
+
+    return compact_cube
+
+
+def create_year_index(df):
+    """
+    Sorts the rows of a given df by genre then year, so that the rows of a genre and a period are a slice
+
+    Parameters
+    ----------
+    df : pd.DataFrame()
+        The df with the columns genre and anneeSortie
+
+    Raises
+    ------
+    -
+
+    Returns
+    -------
+    year_index : dict()
+        genres : pd.Index() of the genres, the segment of a genre is its position + 1
+        positions : np.array() of the positions of the rows with a year, by segment then year. The first
+                    segment is the rows without genre, the last one all the rows. The order of df is kept
+                    for a same year
+        years : np.array() of the year of each position
+        offsets : np.array() of the start of each segment in positions, and the end of the last one
+
+    Sources
+    -------
+    -
+
+    See Also
+    --------
+    get_oldest_and_latest_rows
+    """
+
+    # Rows with a year
+    row_positions = np.flatnonzero(df['anneeSortie'].notna().to_numpy())
+    row_years = df['anneeSortie'].to_numpy(dtype='int64', na_value=0)[row_positions]
+
+    # Segment of each row, the rows without genre get the first one
+    genre_codes, genres = pd.factorize(df['genre'])
+    row_segments = genre_codes[row_positions] + 1
+
+    # Sort by segment, then year, then position, and add the segment of all the rows
+    order = np.lexsort((row_positions, row_years, row_segments))
+    all_order = np.argsort(row_years, kind='stable')
+    positions = np.concatenate([row_positions[order], row_positions[all_order]])
+    years = np.concatenate([row_years[order], row_years[all_order]])
+    segments = np.concatenate([row_segments[order], np.full(len(all_order), len(genres) + 1)])
+
+    year_index = {
+        'genres': pd.Index(genres),
+        'positions': positions,
+        'years': years,
+        'offsets': np.searchsorted(segments, np.arange(len(genres) + 3)),
+    }
+
+    return year_index
+
+
+def get_oldest_and_latest_rows(df, year_index, genre, from_year, to_year):
+    """
+    Gets the rows of the oldest and of the latest year of a genre, or 'All', between from_year and to_year included
+
+    Gives the same rows as filtering df on the genre and the years, then on the min and the max year,
+    with 2 binary searches in the segment of the genre
+
+    Parameters
+    ----------
+    df : pd.DataFrame()
+        The df given to create_year_index()
+    year_index : dict()
+        The index created by create_year_index()
+    genre : str
+        The genre, 'All' for all the genres
+    from_year : int
+        The first year
+    to_year : int
+        The last year
+
+    Raises
+    ------
+    -
+
+    Returns
+    -------
+    oldest_df : pd.DataFrame()
+        The rows of the oldest year
+    latest_df : pd.DataFrame()
+        The rows of the latest year
+
+    Sources
+    -------
+    -
+
+    See Also
+    --------
+    create_year_index
+    """
+
+    # Segment of the genre, an unknown genre has no row
+    if genre == "All":
+        segment = len(year_index['genres']) + 1
+    elif genre in year_index['genres']:
+        segment = year_index['genres'].get_loc(genre) + 1
+    else:
+        return df.iloc[[]], df.iloc[[]]
+    segment_start, segment_end = year_index['offsets'][segment], year_index['offsets'][segment + 1]
+    years = year_index['years'][segment_start:segment_end]
+    positions = year_index['positions'][segment_start:segment_end]
+
+    # Rows of the period
+    start = np.searchsorted(years, from_year, side='left')
+    end = np.searchsorted(years, to_year, side='right')
+    if start >= end:
+        return df.iloc[[]], df.iloc[[]]
+
+    # Rows of the first and of the last year of the period
+    oldest_end = np.searchsorted(years, years[start], side='right')
+    latest_start = np.searchsorted(years, years[end - 1], side='left')
+    oldest_df = df.iloc[positions[start:oldest_end]]
+    latest_df = df.iloc[positions[latest_start:end]]
+
+    return oldest_df, latest_df
+
+
 def clean_year_column(df):
     # Capture the lenght before dropping
     initial_length = len(df)
@@ -0,0 +1,146 @@
+#
+# This file contains the functions to render ahead of time the figures of the callbacks whose inputs have few values.
+# It must be run after preprocess_vsHeroku.py, with the figure store of the app enabled:
+#
+#   FIGURE_STORE_PATH=<path> python Src/preprocess_vsFigures.py
+#
+# The app then reads these figures from the store instead of computing them.
+#
+
+
+# External lib
+import json
+import os
+
+import plotly
+
+
+# Local lib
+import preprocess_vsCommon
+import cache
+
+
+# Global variable
+max_top_n = 10
+
+
+def create_callback_request_body(dash_app, output, values):
+    # Same request as the one sent by the browser, see dash.Dash.dispatch
+    callback = dash_app.callback_map[output]
+    body = {
+        'output': output,
+        'outputs': [
+            {'id': output_id, 'property': output_property}
+            for output_id, output_property in (item.split(".") for item in output.strip(".").split("..."))
+        ],
+        'inputs': [
+            {'id': item['id'], 'property': item['property'], 'value': values[item['id'] + "." + item['property']]}
+            for item in callback['inputs']
+        ],
+        'changedPropIds': [],
+    }
+    if len(body['outputs']) == 1:
+        body['outputs'] = body['outputs'][0]
+
+    # Values are sent as JSON
+    return json.loads(json.dumps(body, cls=plotly.utils.PlotlyJSONEncoder))
+
+
+def create_precomputed_request_bodies(app_module):
+    # Every genre, with the full range of years
+    treemap_genres = ["All"] + preprocess_vsCommon.get_list_of_genres(df=app_module.treemap_df)
+    treemap_years = list(preprocess_vsCommon.get_min_and_max_year(df=app_module.treemap_df))
+    bumpchart_genres = ["All"] + preprocess_vsCommon.get_list_of_genres(df=app_module.bumpchart_df)
+    table_years = list(preprocess_vsCommon.get_min_and_max_year(df=app_module.table_df))
+
+    # Every person of the barchart, and no person
+    barchart_clicks = [None] + [
+        {'points': [{'text': name}]} for name in app_module.barchart_df.index
+    ]
+
+    # Values of the inputs, for the callbacks run by the server
+    input_values = [
+        {'treemap-dropdown-menu.value': genre, 'treemap-range-slider.value': treemap_years}
+        for genre in treemap_genres
+    ] + [
+        {'bumpchart-dropdown-menu.value': genre, 'table-range-slider.value': table_years, 'table-slider.value': [top_n]}
+        for genre in bumpchart_genres for top_n in range(1, max_top_n + 1)
+    ] + [
+        {'barchart-graph.clickData': barchart_click}
+        for barchart_click in barchart_clicks
+    ]
+
+    # A callback reading only some of the values, e.g. not the top n, is rendered once per distinct request
+    bodies = {}
+    for values in input_values:
+        for output, callback in app_module.app.callback_map.items():
+            if 'callback' not in callback or any(item['id'] + "." + item['property'] not in values for item in callback['inputs']):
+                continue
+            body = create_callback_request_body(dash_app=app_module.app, output=output, values=values)
+            bodies[json.dumps(body, sort_keys=True)] = body
+
+    return list(bodies.values())
+
+
+def create_precomputed_figures():
+    """
+    Renders the layout and the figures of the callbacks whose inputs have few values into the
+    figure store of the app, where they are pinned.
+
+    The enumerated inputs are every genre of the treemap, every genre of the bumpchart with
+    every top N of the table, for the full range of years only, and every person of the
+    barchart. Only the callbacks run by the server are rendered, the bumpchart, and the treemap
+    and the top n of the table with app.clientside_filtering, are computed in the browser.
+    Each request goes through the app itself, so the stored responses are exactly the ones the
+    callbacks would return.
+
+    Parameters
+    ----------
+    -
+
+    Raises
+    ------
+    RuntimeError
+        If the figure store is not enabled, i.e. FIGURE_STORE_PATH is not set
+
+    Returns
+    -------
+    count : int
+        The number of responses stored
+
+    Sources
+    -------
+    -
+
+    See Also
+    --------
+    cache.create_sqlite_store
+    """
+
+    if not os.environ.get('FIGURE_STORE_PATH'):
+        raise RuntimeError("Set FIGURE_STORE_PATH to the figure store of the app.")
+
+    # The app builds the store with the version of the current files and code
+    import app as app_module  # pylint: disable=import-outside-toplevel
+    client = app_module.app.server.test_client()
+
+    # Render the layout
+    response = client.get('/_dash-layout')
+    cache.set_stored_value(store=app_module.figure_store, key=cache.layout_cache_key, value=response.get_data(), pinned=True)
+    count = 1
+
+    # Render the callbacks
+    for body in create_precomputed_request_bodies(app_module=app_module):
+        response = client.post('/_dash-update-component', json=body)
+        if response.status_code != 200:
+            continue
+        key = cache.create_callback_cache_key(body=body, input_keys=app_module.response_input_keys)
+        cache.set_stored_value(store=app_module.figure_store, key=key, value=response.get_data(), pinned=True)
+        count += 1
+
+    return count
+
+
+if __name__ == "__main__":
+    count = create_precomputed_figures()
+    print("Stored " + str(count) + " responses")
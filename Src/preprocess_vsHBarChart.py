@@ -42,33 +42,43 @@ def clean_film_df_for_h_barchart(film_df):
 
 def create_h_barchart_df(raw_h_barchart_df):
     
-    temp_df = raw_h_barchart_df.copy()
-    
-    temp_df["value"] = 1
-    
-    temp_df = (
-        pd.pivot_table(
-            temp_df, 
-            values="value", 
-            index=["nomComplet", "titreOriginal"], 
-            columns="genre"
-        )
-        .fillna(0)
-        .groupby("nomComplet")
-        .agg(sum)
-        .reset_index()
-        .melt(
-            id_vars=['nomComplet'], 
-            var_name=None, 
-            value_name='nombreDeFilms'
-        )
+    # Count the distinct titles of each producer by genre
+    # Only the non-zero counts are kept, the missing producer and genre pairs are zeros
+    temp_df = (raw_h_barchart_df[['nomComplet', 'genre', 'titreOriginal']]
+        .dropna()
+        .drop_duplicates()
+        .groupby(['nomComplet', 'genre'], observed=True)
+        .size()
+        .reset_index(name='nombreDeFilms')
     )
     
     return temp_df  
 
 
+def create_h_barchart_decade_df(raw_h_barchart_df):
+
+    # Movies without year cannot be placed in a decade
+    temp_df, count_dropped_no_year, count_filtered_year_greater_now = common.clean_year_column(df=raw_h_barchart_df)
+
+    # Add a 'debutDecennie' column, the first year of the decade [d, d+9]
+    # Not 'decennie', which is the last year of the decade ]d-10, d] in the bumpchart
+    temp_df = temp_df[['nomComplet', 'genre', 'anneeSortie', 'titreOriginal']].copy()
+    temp_df['debutDecennie'] = temp_df['anneeSortie'] - temp_df['anneeSortie'] % 10
+
+    # Count the distinct titles of each producer by genre and decade, as create_h_barchart_df
+    temp_df = (temp_df[['nomComplet', 'genre', 'debutDecennie', 'titreOriginal']]
+        .dropna()
+        .drop_duplicates()
+        .groupby(['nomComplet', 'genre', 'debutDecennie'], observed=True)
+        .size()
+        .reset_index(name='nombreDeFilms')
+    )
+
+    return temp_df
+
+
 def create_average_df_for_h_barchart(h_barchart_df):
-    # Compute average
+    # Compute average, the zeros missing from h_barchart_df do not change the sums
     temp_df = (h_barchart_df
         .groupby('genre')
         .agg(moyenne=pd.NamedAgg(column='nombreDeFilms', aggfunc='sum')) 
@@ -1,9 +1,20 @@
 #
-# This file contains the functions to create the lighter .csv files that might allow Heroku app to run.
+# This file contains the functions to create the lighter preprocessed files that might allow Heroku app to run.
+# It is the build entry point and must be run before starting the app:
+#
+#   python Src/preprocess_vsHeroku.py [--force]
+#
+# Only the files whose raw inputs or code changed since the last build are recomputed.
 #
 
 
 # External lib
+import argparse
+import glob
+import hashlib
+import inspect
+import json
+import os
 import pandas as pd
 
 
@@ -17,39 +28,384 @@ import preprocess_vsTable
 import preprocess_vsBarChart
 import preprocess_vsHBarChart
 
-def create_data_files():
-    # load data
-    raw_film_df = preprocess_vsBackEnd.create_master_film_df()
-    film_df = preprocess_vsBackEnd.clean_film_df_columns(raw_film_df=raw_film_df)
-    #preprocess_vsBackEnd.create_file_from_df(df=film_df, file_name="film_vsMaitre.csv")
-
-    # Sunburst
-    #sunburst_df = preprocess_vsSunburst.clean_film_df_for_sunburst(film_df=film_df)
-    #preprocess_vsBackEnd.create_file_from_df(df=sunburst_df, file_name="p_sunburst.csv")
-
-    # Bump Chart
-    raw_bumpchart_df = preprocess_vsBumpChart.clean_film_df_for_bumpchart(film_df=film_df)
-    #bumpchart_df = preprocess_vsBumpChart.prepare_data_for_bumpchart(raw_bumpchart_df=raw_bumpchart_df)
-    #preprocess_vsBackEnd.create_file_from_df(df=bumpchart_df, file_name="p_bumpchart.csv")
-    
-    # Treemap
-    treemap_df = preprocess_vsTreemap.create_treemap_df(raw_bumpchart_df=raw_bumpchart_df)
-    preprocess_vsBackEnd.create_file_from_df(df=treemap_df, file_name="p_treemap.csv")
-
-    # Table
-    #table_df = preprocess_vsTable.create_table_df(raw_bumpchart_df=raw_bumpchart_df)
-    #preprocess_vsBackEnd.create_file_from_df(df=table_df, file_name="p_table.csv")
-
-    # Barchart
-    #raw_distinction_df = preprocess_vsBackEnd.backend_load_distinction()
-    #distinction_df = preprocess_vsBarChart.clean_distinction_df(raw_distinction_df=raw_distinction_df)
-    #preprocess_vsBackEnd.create_file_from_df(df=distinction_df, file_name="p_distinction.csv") 
-
-    # Horizontal Bar Chart
-    #raw_h_barchart_df = preprocess_vsHBarChart.clean_film_df_for_h_barchart(film_df=film_df)
-    #h_barchart_df = preprocess_vsHBarChart.create_h_barchart_df(raw_h_barchart_df=raw_h_barchart_df)
-    #avg_df = preprocess_vsHBarChart.create_average_df_for_h_barchart(h_barchart_df=h_barchart_df)
-    #preprocess_vsBackEnd.create_file_from_df(df=h_barchart_df, file_name="p_h_barchart.csv")
-    #preprocess_vsBackEnd.create_file_from_df(df=avg_df, file_name="p_avg.csv") 
-    
+
+# Global variable
+checkpoint_path = preprocess_vsBackEnd.relative_path + ".cache/"
+
+
+def build_raw_film():
+    return preprocess_vsBackEnd.create_master_film_df()
+
+
+def build_film(raw_film_df):
+    return preprocess_vsBackEnd.clean_film_df_columns(raw_film_df=raw_film_df)
+
+
+def build_sunburst(film_df):
+    return preprocess_vsSunburst.clean_film_df_for_sunburst(film_df=film_df)
+
+
+def build_raw_bumpchart(film_df):
+    return preprocess_vsBumpChart.clean_film_df_for_bumpchart(film_df=film_df)
+
+
+def build_bumpchart(raw_bumpchart_df):
+    return preprocess_vsBumpChart.prepare_data_for_bumpchart(raw_bumpchart_df=raw_bumpchart_df)
+
+
+def build_treemap(raw_bumpchart_df):
+    return preprocess_vsTreemap.create_treemap_df(raw_bumpchart_df=raw_bumpchart_df)
+
+
+def build_table(raw_bumpchart_df):
+    return preprocess_vsTable.create_table_df(raw_bumpchart_df=raw_bumpchart_df)
+
+
+def build_distinction():
+    raw_distinction_df = preprocess_vsBackEnd.backend_load_distinction()
+    return preprocess_vsBarChart.clean_distinction_df(raw_distinction_df=raw_distinction_df)
+
+
+def build_raw_h_barchart(film_df):
+    return preprocess_vsHBarChart.clean_film_df_for_h_barchart(film_df=film_df)
+
+
+def build_h_barchart(raw_h_barchart_df):
+    return preprocess_vsHBarChart.create_h_barchart_df(raw_h_barchart_df=raw_h_barchart_df)
+
+
+def build_h_barchart_decade(raw_h_barchart_df):
+    return preprocess_vsHBarChart.create_h_barchart_decade_df(raw_h_barchart_df=raw_h_barchart_df)
+
+
+def build_avg(h_barchart_df):
+    return preprocess_vsHBarChart.create_average_df_for_h_barchart(h_barchart_df=h_barchart_df)
+
+
+# Dependency graph of the build
+#   function:  called with the results of the upstream steps, in order
+#   steps:     upstream steps
+#   inputs:    raw files read by the step itself
+#   modules:   preprocessing modules whose code is used by the step
+#   functions: functions of preprocess_vsBackEnd used by the step, the rest of this module is app code
+#   file_name: preprocessed file written from the result, if any
+build_steps = {
+    'raw_film': {
+        'function': build_raw_film,
+        'steps': [],
+        'inputs': [file_name for file_name in preprocess_vsBackEnd.raw_file_names if file_name != "distinction.csv"],
+        'modules': [],
+        'functions': [preprocess_vsBackEnd.create_master_film_df],
+        'file_name': None,
+    },
+    'film': {
+        'function': build_film,
+        'steps': ['raw_film'],
+        'inputs': [],
+        'modules': [preprocess_vsCommon],
+        'functions': [preprocess_vsBackEnd.clean_film_df_columns],
+        'file_name': None,
+    },
+    'sunburst': {
+        'function': build_sunburst,
+        'steps': ['film'],
+        'inputs': [],
+        'modules': [preprocess_vsSunburst, preprocess_vsCommon],
+        'functions': [],
+        'file_name': "p_sunburst.feather",
+    },
+    'raw_bumpchart': {
+        'function': build_raw_bumpchart,
+        'steps': ['film'],
+        'inputs': [],
+        'modules': [preprocess_vsBumpChart, preprocess_vsCommon],
+        'functions': [],
+        'file_name': None,
+    },
+    'bumpchart': {
+        'function': build_bumpchart,
+        'steps': ['raw_bumpchart'],
+        'inputs': [],
+        'modules': [preprocess_vsBumpChart],
+        'functions': [],
+        'file_name': "p_bumpchart.feather",
+    },
+    'treemap': {
+        'function': build_treemap,
+        'steps': ['raw_bumpchart'],
+        'inputs': [],
+        'modules': [preprocess_vsTreemap],
+        'functions': [],
+        'file_name': "p_treemap.feather",
+    },
+    'table': {
+        'function': build_table,
+        'steps': ['raw_bumpchart'],
+        'inputs': [],
+        'modules': [preprocess_vsTable],
+        'functions': [],
+        'file_name': "p_table.feather",
+    },
+    'distinction': {
+        'function': build_distinction,
+        'steps': [],
+        'inputs': ["distinction.csv"],
+        'modules': [preprocess_vsBarChart],
+        'functions': [preprocess_vsBackEnd.backend_load_distinction],
+        'file_name': "p_distinction.feather",
+    },
+    'raw_h_barchart': {
+        'function': build_raw_h_barchart,
+        'steps': ['film'],
+        'inputs': [],
+        'modules': [preprocess_vsHBarChart],
+        'functions': [],
+        'file_name': None,
+    },
+    'h_barchart': {
+        'function': build_h_barchart,
+        'steps': ['raw_h_barchart'],
+        'inputs': [],
+        'modules': [preprocess_vsHBarChart],
+        'functions': [],
+        'file_name': "p_h_barchart.feather",
+    },
+    'h_barchart_decade': {
+        'function': build_h_barchart_decade,
+        'steps': ['raw_h_barchart'],
+        'inputs': [],
+        'modules': [preprocess_vsHBarChart, preprocess_vsCommon],
+        'functions': [],
+        'file_name': "p_h_barchart_decade.feather",
+    },
+    'avg': {
+        'function': build_avg,
+        'steps': ['h_barchart'],
+        'inputs': [],
+        'modules': [preprocess_vsHBarChart],
+        'functions': [],
+        'file_name': "p_avg.feather",
+    },
+}
+
+
+def get_function_sources(function):
+    # Source of the function and of the functions of its module it calls, recursively
+    module = inspect.getmodule(function)
+    sources = {}
+    pending_functions = [function]
+    while pending_functions:
+        current_function = pending_functions.pop()
+        if current_function.__name__ in sources:
+            continue
+        sources[current_function.__name__] = inspect.getsource(current_function)
+
+        # The names used by comprehensions and lambdas are in their own code objects
+        code_objects = [current_function.__code__]
+        while code_objects:
+            code_object = code_objects.pop()
+            code_objects += [const for const in code_object.co_consts if inspect.iscode(const)]
+            for name in code_object.co_names:
+                called_function = getattr(module, name, None)
+                if inspect.isfunction(called_function) and called_function.__module__ == module.__name__:
+                    pending_functions.append(called_function)
+
+    return sources
+
+
+def compute_step_fingerprints(step_names=None):
+    # Hash each raw file and each module only once, and only for the steps asked
+    input_hashes = {}
+    module_hashes = {}
+
+    def get_input_hash(file_name):
+        if file_name not in input_hashes:
+            # Raw files that are not deployed cannot be hashed
+            is_deployed = os.path.isfile(preprocess_vsBackEnd.relative_path + file_name)
+            input_hashes[file_name] = preprocess_vsBackEnd.compute_file_hash(file_name) if is_deployed else None
+        return input_hashes[file_name]
+
+    def get_module_hash(module):
+        if module.__name__ not in module_hashes:
+            with open(inspect.getsourcefile(module), 'rb') as file:
+                module_hashes[module.__name__] = hashlib.sha256(file.read()).hexdigest()
+        return module_hashes[module.__name__]
+
+    # A step changes if its code, its raw files or one of its upstream steps changes
+    # A step with a missing raw file has no fingerprint, None, nor have its downstream steps
+    fingerprints = {}
+
+    def compute_fingerprint(step_name):
+        if step_name not in fingerprints:
+            step = build_steps[step_name]
+            input_hash_list = [get_input_hash(file_name) for file_name in step['inputs']]
+            upstream_fingerprints = [compute_fingerprint(upstream_step) for upstream_step in step['steps']]
+            if None in input_hash_list or None in upstream_fingerprints:
+                fingerprints[step_name] = None
+                return None
+
+            description = {
+                'function': inspect.getsource(step['function']),
+                'modules': [get_module_hash(module) for module in step['modules']],
+                'functions': [get_function_sources(function=function) for function in step['functions']],
+                'inputs': input_hash_list,
+                'schemas': [preprocess_vsBackEnd.raw_file_schemas[file_name] for file_name in step['inputs']],
+                'steps': upstream_fingerprints,
+            }
+
+            # Every preprocessed file is normalized and written by the same function
+            if step['file_name'] is not None:
+                description['write'] = {
+                    'functions': get_function_sources(function=preprocess_vsBackEnd.create_preprocessed_file_from_df),
+                    'schema': preprocess_vsBackEnd.preprocessed_file_schemas[step['file_name']],
+                }
+            fingerprints[step_name] = hashlib.sha256(
+                json.dumps(description, sort_keys=True).encode('utf-8')
+            ).hexdigest()
+        return fingerprints[step_name]
+
+    for step_name in (build_steps if step_names is None else step_names):
+        compute_fingerprint(step_name)
+
+    return fingerprints
+
+
+def load_previous_step_fingerprints():
+    # A missing manifest means nothing has been built yet
+    try:
+        manifest = preprocess_vsBackEnd.load_manifest_file()
+    except FileNotFoundError:
+        return {}
+
+    # Files modified outside of the build are rebuilt
+    fingerprints = manifest.get('steps', {})
+    for step_name, step in build_steps.items():
+        file_name = step['file_name']
+        if file_name is None or step_name not in fingerprints:
+            continue
+        if (not os.path.isfile(preprocess_vsBackEnd.relative_path + file_name)
+                or preprocess_vsBackEnd.compute_file_hash(file_name) != manifest['artifacts'].get(file_name)):
+            del fingerprints[step_name]
+
+    return fingerprints
+
+
+def get_checkpoint_full_path(step_name, fingerprint):
+    return checkpoint_path + step_name + "_" + fingerprint[:16] + ".pkl"
+
+
+def load_checkpoint(step_name, fingerprint):
+    full_path = get_checkpoint_full_path(step_name=step_name, fingerprint=fingerprint)
+    if not os.path.isfile(full_path):
+        return None
+
+    return pd.read_pickle(full_path)
+
+
+def create_checkpoint(df, step_name, fingerprint):
+    # Remove the outdated checkpoints of the step
+    os.makedirs(checkpoint_path, exist_ok=True)
+    for outdated_path in glob.glob(checkpoint_path + step_name + "_*.pkl"):
+        os.remove(outdated_path)
+
+    # Write to a temporary file first so that an interrupted build never leaves a partial checkpoint
+    full_path = get_checkpoint_full_path(step_name=step_name, fingerprint=fingerprint)
+    df.to_pickle(full_path + ".tmp")
+    os.replace(full_path + ".tmp", full_path)
+
     return
+
+
+def create_data_files(force=False):
+    """
+    Builds the preprocessed files following the dependency graph build_steps.
+
+    A preprocessed file is only rebuilt if its fingerprint, i.e. the hash of its code, its raw files
+    and its upstream steps, differs from the one recorded in the manifest. The result of every
+    step is checkpointed, so that a failed build resumes from the last completed step.
+
+    The raw files do not all need to be deployed: a step whose raw files are missing is kept as
+    is, as long as its preprocessed file still matches the manifest.
+
+    Parameters
+    ----------
+    force : bool
+        Rebuild every preprocessed file, even the up to date ones
+
+    Raises
+    ------
+    FileNotFoundError
+        If the raw files needed to build a missing or modified preprocessed file are missing
+
+    Returns
+    -------
+    rebuilt_file_names : list()
+        The preprocessed files that have been rebuilt
+
+    Sources
+    -------
+    -
+
+    See Also
+    --------
+    preprocess_vsBackEnd.check_preprocessed_files
+    """
+
+    file_step_names = [step_name for step_name, step in build_steps.items() if step['file_name'] is not None]
+    fingerprints = compute_step_fingerprints(step_names=file_step_names)
+    previous_fingerprints = {} if force else load_previous_step_fingerprints()
+
+    # Without its raw files, a step is current if its file still matches the manifest
+    for step_name in file_step_names:
+        if fingerprints[step_name] is not None:
+            continue
+        if step_name in previous_fingerprints:
+            fingerprints[step_name] = previous_fingerprints[step_name]
+        elif build_steps[step_name]['file_name'] in preprocess_vsBackEnd.optional_preprocessed_file_names:
+            print("Skipping " + step_name + ", its raw files are missing")
+        else:
+            raise FileNotFoundError(
+                "Missing raw file(s) to build " + build_steps[step_name]['file_name'] +
+                ", add them to " + preprocess_vsBackEnd.relative_path + " and run the build again."
+            )
+
+    # Compute a step only when a stale file needs it, from its checkpoint if possible
+    results = {}
+
+    def get_step_result(step_name):
+        if step_name not in results:
+            step = build_steps[step_name]
+            df = load_checkpoint(step_name=step_name, fingerprint=fingerprints[step_name])
+            if df is None:
+                upstream_dfs = [get_step_result(upstream_step) for upstream_step in step['steps']]
+                print("Building " + step_name)
+                df = step['function'](*upstream_dfs)
+                create_checkpoint(df=df, step_name=step_name, fingerprint=fingerprints[step_name])
+            results[step_name] = df
+        return results[step_name]
+
+    # Rebuild the stale files
+    rebuilt_file_names = []
+    for step_name in file_step_names:
+        step = build_steps[step_name]
+        if fingerprints[step_name] is None or previous_fingerprints.get(step_name) == fingerprints[step_name]:
+            continue
+        preprocess_vsBackEnd.create_preprocessed_file_from_df(df=get_step_result(step_name), file_name=step['file_name'])
+        rebuilt_file_names.append(step['file_name'])
+
+    # Record the hashes of the raw and preprocessed files
+    preprocess_vsBackEnd.create_manifest_file(step_fingerprints={
+        step_name: fingerprints[step_name]
+        for step_name in file_step_names if fingerprints[step_name] is not None
+    })
+
+    return rebuilt_file_names
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Build the preprocessed files used by the app.")
+    parser.add_argument('--force', action='store_true', help="rebuild every file, even the up to date ones")
+    args = parser.parse_args()
+
+    rebuilt_file_names = create_data_files(force=args.force)
+    print("Rebuilt: " + (", ".join(rebuilt_file_names) if rebuilt_file_names else "nothing, all files are up to date"))
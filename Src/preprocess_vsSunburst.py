@@ -7,12 +7,24 @@
 import numpy as np
 import pandas as pd
 import datetime
+import re
 
 
 # Internal lib
 import preprocess_vsCommon as common
 
 
+# Global variable
+# Label of a genre identifier: the first rule whose pattern is found in it, case insensitive, gives its label
+genre_label_rules = [
+    ('VIDÉOS|VIDÉO', 'Vidéos'),
+    ('ÉMISSIONS', 'Émissions'),
+    ('TV', 'TV'),
+]
+# Label of a genre identifier that matches no rule
+default_genre_label = 'Films'
+
+
 def clean_duplicates_for_sunburst(df):
     # Drop duplicates due to irrelevant fields
     temp_df = df.drop_duplicates(
@@ -46,46 +58,21 @@ def clean_genre_column_for_sunburst(df):
     return temp_df, count_dropped_no_genre
 
 
-def clean_genre_label_column_for_sunburst(df):
+def classify_genre_label(genre_identifier):
+    # Apply the rules in order
+    for pattern, label in genre_label_rules:
+        if re.search(pattern, genre_identifier, flags=re.IGNORECASE):
+            return label
     
-    # Explicit copy
-    temp_df = df.copy()
-
-    # Replace strings 'VIDÉOS|VIDÉO' for 'Vidéos'
-    temp_df = common.replace_str_containing_str(
-        df=temp_df, 
-        column_name='genreIdentifiant', 
-        search_str='VIDÉOS|VIDÉO', 
-        new_str='Vidéos',
-        contain_word=True
-    )
-    
-    # Replace strings 'ÉMISSIONS' for 'Émissions'
-    temp_df = common.replace_str_containing_str(
-        df=temp_df, 
-        column_name='genreIdentifiant', 
-        search_str='ÉMISSIONS', 
-        new_str='Émissions',
-        contain_word=True
-    )
-    
-    # Replace strings 'TV' for 'TV'
-    temp_df = common.replace_str_containing_str(
-        df=temp_df, 
-        column_name='genreIdentifiant', 
-        search_str='TV', 
-        new_str='TV',
-        contain_word=True
-    )
+    return default_genre_label
+
+
+def clean_genre_label_column_for_sunburst(df):
     
-    # Replace strings that do not contain 'Vidéos|Émissions|TV' for 'Films'
-    temp_df = common.replace_str_containing_str(
-        df=temp_df, 
-        column_name='genreIdentifiant', 
-        search_str='Vidéos|Émissions|TV', 
-        new_str='Films',
-        contain_word=False
-    )
+    # Classify each distinct genre identifier once
+    temp_df = common.normalize_string_columns(df=df, spec={
+        'genreIdentifiant': [classify_genre_label],
+    })
 
     return temp_df
 
@@ -108,6 +95,6 @@ def clean_film_df_for_sunburst(film_df):
     temp_df = clean_genre_label_column_for_sunburst(df=temp_df)
 
     # Select only relevant columns
-    temp_df = temp_df[['titreOriginal', 'genre', 'sousGenre0', 'sousGenre1']]
+    temp_df = temp_df[['titreOriginal', 'genreIdentifiant', 'genre', 'sousGenre0', 'sousGenre1']]
 
     return temp_df
@@ -10,6 +10,8 @@ import dash_core_components as dcc
 
 import plotly.io as pio
 
+import preprocess_vsBackEnd
+
 
 def remove_empty_duplicates(df):
     '''
@@ -41,7 +43,7 @@ def load_movie_data():
     Dataframe avec la liste des films
     '''
     # Chargement d u de films
-    df = pd.read_csv('./Src/assets/data/p_sunburst.csv')
+    df = preprocess_vsBackEnd.load_preprocessed_sunburst_file()
     # On met le niveau 2 en minuscule pour éviter les conflits avec le niveau 1
     df['sousGenre1'] = df['sousGenre1'].str.lower()
     df = remove_empty_duplicates(df)
@@ -12,13 +12,30 @@ import dash
 import dash_html_components as html
 import dash_core_components as dcc
 
-import plotly.graph_objects as go
-
 # Internal lib
 import preprocess_vsCommon as common
+import figure_dict
+
+
+def create_table_count_cube(df):
+    # Count the movies by genre, year and language, once
+    table_cube = common.create_count_cube(
+        df=df,
+        dim_col_names=['langue'],
+        count_col_name='anneeSortie'
+    )
+
+    return table_cube
+
+
+def create_table_year_index(df):
+    # Sort the movies by genre and year, once
+    table_year_index = common.create_year_index(df=df)
+
+    return table_year_index
 
 
-def query_data_for_table(table_df, genre, from_year, to_year, top_n):
+def query_top_n_for_table(table_cube, genre, from_year, to_year, top_n):
     
     # Replace function to use with .apply()
     def replace_string(x):
@@ -27,35 +44,17 @@ def query_data_for_table(table_df, genre, from_year, to_year, top_n):
         else:
                 return 'autres'
 
-    # Extract data corresponding to the right genre
-    if genre == "All":
-        temp_df = table_df.copy()
-    else:
-        query_str = "genre=='" + genre + "'"
-        temp_df = table_df.query(query_str)
-    
-    # Extract data corresponding to the right years
-    query_str = "anneeSortie>=" + str(from_year)
-    temp_df = temp_df.query(query_str)
-    query_str = "anneeSortie<=" + str(to_year)
-    temp_df = temp_df.query(query_str)
-    
-    # Extract oldest movie from that period
-    oldest_date = temp_df['anneeSortie'].min()
-    query_str = "anneeSortie==" + str(oldest_date)
-    oldest_df = temp_df.query(query_str)
-    
-    # Extract latest movie from that period
-    latest_date = temp_df['anneeSortie'].max()
-    query_str = "anneeSortie==" + str(latest_date)
-    latest_df = temp_df.query(query_str)
-    
-    # Get count of movies for each language
-    top_n_df = (temp_df
-        .groupby('langue')
-        .agg(nombreDeFilms=pd.NamedAgg(column='anneeSortie', aggfunc='count'))
-        .reset_index()
-        .sort_values(['nombreDeFilms'], ascending=[False])
+    # Get count of movies for each language, ties stay in the order of the languages (see Assets/table.js)
+    top_n_df = (common
+        .query_count_cube(
+            cube=table_cube,
+            genre=genre,
+            from_year=from_year,
+            to_year=to_year,
+            count_col_name='nombreDeFilms'
+        )
+        .astype({'langue': 'object'})
+        .sort_values(['nombreDeFilms'], ascending=[False], kind='mergesort')
     )
     
     # handles cases where there is more than n languages
@@ -71,7 +70,7 @@ def query_data_for_table(table_df, genre, from_year, to_year, top_n):
             .groupby(['langue'])
             .agg(nombreDeFilms=pd.NamedAgg(column='nombreDeFilms', aggfunc='sum'))
             .reset_index()
-            .sort_values(['nombreDeFilms'], ascending=[False])
+            .sort_values(['nombreDeFilms'], ascending=[False], kind='mergesort')
         )
     # else: no need to do anything
     
@@ -83,6 +82,29 @@ def query_data_for_table(table_df, genre, from_year, to_year, top_n):
     
     top_n_df = common.round_decimals(df=top_n_df, n_decimals=2)
     
+    return top_n_df
+
+
+def query_data_for_table(table_df, table_cube, table_year_index, genre, from_year, to_year, top_n):
+
+    # Extract oldest and latest movies from that period, for the right genre
+    oldest_df, latest_df = common.get_oldest_and_latest_rows(
+        df=table_df,
+        year_index=table_year_index,
+        genre=genre,
+        from_year=from_year,
+        to_year=to_year
+    )
+    
+    # Get the top n languages
+    top_n_df = query_top_n_for_table(
+        table_cube=table_cube,
+        genre=genre,
+        from_year=from_year,
+        to_year=to_year,
+        top_n=top_n
+    )
+    
     return top_n_df, oldest_df, latest_df
 
 
@@ -155,95 +177,113 @@ def create_table_slider(initial_value):
     return slider
 
 
-def create_table_fig(top_n_df, oldest_df, latest_df, top_n):
+def create_table_trace(columnwidth, header_values, cells_values):
+    # Same trace as go.Table, without its validation
+    trace = dict(
+        type='table',
+        columnorder=[1,2,3],
+        columnwidth=columnwidth,
+        header=dict(
+            values=header_values,
+            fill=dict(color='#81B4E3'),
+            align='center'
+        ),
+        cells=dict(
+            values=cells_values,
+            fill=dict(color='#E5ECF6'),
+            align='left'
+        ),
+    )
+
+    return trace
+
+
+def create_table_layout(title):
+    # Same layout as go.Figure.update_layout, without its validation
+    layout = dict(
+        title=dict(text=title, x=0.5),
+        font=dict(family="Helvetica", color="#3B3838"),
+        paper_bgcolor='rgba(0,0,0,0)',
+        height=400,
+        margin=dict(l=10,r=10)
+    )
+
+    return layout
+
+
+def create_table_top_n_fig(top_n_df, top_n):
 
     # Create table_top_n_fig
-    table_top_n_fig = go.Figure(
+    table_top_n_fig = figure_dict.create_figure(
         data=[
-            go.Table(
-                columnorder = [1,2,3],
-                columnwidth = [100,100,100],
+            create_table_trace(
+                columnwidth=[100,100,100],
                 header_values=["<b>Langue</b>", "<b>Nombre de films</b>", "<b>Proportion</b>"],
-                header_fill_color='#81B4E3',
-                header_align='center',
                 cells_values=[top_n_df.langue, top_n_df.nombreDeFilms, top_n_df.pourcentageDeFilms.astype(str) + " %"],
-                cells_fill_color='#E5ECF6',
-                cells_align='left',
             )
-        ]
-    )
-    
-    table_top_n_fig.update_layout(
-        title= 'TOP ' + str(top_n) + ': Langues des productions',
-        title_x=0.5,
-        font_family="Helvetica",
-        font_color="#3B3838",
-        paper_bgcolor='rgba(0,0,0,0)',
-        height=400,
-        margin=dict(l=10,r=10)
+        ],
+        layout=create_table_layout(title='TOP ' + str(top_n) + ': Langues des productions')
     )
+
+    return table_top_n_fig
+
+
+def create_table_oldest_and_latest_fig(oldest_df, latest_df):
+
     # Filter n.d.
     #latest_df = latest_df[~(latest_df['langue'].isin([None, "n.d.", np.nan]))].head()
 
     # Create table_latest_fig 
-    table_latest_fig = go.Figure(
+    table_latest_fig = figure_dict.create_figure(
         data=[
-            go.Table(
-                columnorder = [1,2,3],
-                columnwidth = [200,50,60],
+            create_table_trace(
+                columnwidth=[200,50,60],
                 header_values=["<b>Titre</b>", "<b>Année</b>", "<b>Langue</B>"],
-                header_fill_color='#81B4E3',
-                header_align='center',
                 cells_values=[latest_df.titreOriginal, latest_df.anneeSortie, latest_df.langue],
-                cells_fill_color='#E5ECF6',
-                cells_align='left',
             )
-        ]
-    )
-
-    table_latest_fig.update_layout(
-        title="Les plus récentes oeuvres de la période",
-        title_x=0.5,
-        font_family="Helvetica",
-        font_color="#3B3838",
-        paper_bgcolor='rgba(0,0,0,0)',
-        height=400,
-        margin=dict(l=10,r=10)
+        ],
+        layout=create_table_layout(title="Les plus récentes oeuvres de la période")
     )
     
     # Filter n.d.
     # oldest_df = oldest_df[~(oldest_df['langue'].isin([None, "n.d.", np.nan]))].head()
     
     # Create table_oldest_fig
-    table_oldest_fig = go.Figure(
+    table_oldest_fig = figure_dict.create_figure(
         data=[
-            go.Table(
-                columnorder = [1,2,3],
-                columnwidth = [200,50,60],
+            create_table_trace(
+                columnwidth=[200,50,60],
                 header_values=["<b>Titre</b>", "<b>Année</b>", "<b>Langue</B>"],
-                header_fill_color='#81B4E3',
-                header_align='center',
                 cells_values=[oldest_df.titreOriginal, oldest_df.anneeSortie, oldest_df.langue],
-                cells_fill_color='#E5ECF6',
-                cells_align='left',
             )
-        ]
+        ],
+        layout=create_table_layout(title="Les plus anciennes oeuvres de la période")
     )
 
-    oldest_df.anneeSortie
-    table_oldest_fig.update_layout(
-        title="Les plus anciennes oeuvres de la période",
-        title_x=0.5,
-        font_family="Helvetica",
-        font_color="#3B3838",
-        height=400,
-        paper_bgcolor='rgba(0,0,0,0)',
-        margin=dict(l=10,r=10)
-    )
+    return table_latest_fig, table_oldest_fig
+
+
+def create_table_fig(top_n_df, oldest_df, latest_df, top_n):
+    table_top_n_fig = create_table_top_n_fig(top_n_df=top_n_df, top_n=top_n)
+    table_latest_fig, table_oldest_fig = create_table_oldest_and_latest_fig(oldest_df=oldest_df, latest_df=latest_df)
 
     return table_top_n_fig, table_latest_fig, table_oldest_fig
 
 
+def create_table_store(table_cube, table_top_n_fig, table_title):
+    # Counts, figure and title restyled in the browser when the genre, the years or the top n change, see Assets/table.js
+    table_store = dcc.Store(
+        id='table-store',
+        data={
+            'cube': common.create_compact_count_cube(cube=table_cube),
+            'figure': table_top_n_fig,
+            'title': table_title.to_plotly_json(),
+        },
+    )
+
+    return table_store
+
+
 def create_table_top_n_graph(table_top_n_fig):
     table_top_n_graph = dcc.Graph(
         figure=table_top_n_fig, 
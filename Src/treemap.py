@@ -16,6 +16,9 @@ import dash_html_components as html
 import dash_core_components as dcc
 import plotly.express as px
 
+import preprocess_vsCommon as common
+import figure_dict
+
 def get_treemap_hover_template():
 
     hover = '<b>%{label}</b>  <br><br>' + \
@@ -109,64 +112,126 @@ def create_treemap_range_slider(year_min, year_max):
     return rs
 
 
-def query_data_for_treemap(df, genre, from_year, to_year):
-    
-    # Extract data corresponding to the right genre
-    if genre == "All":
-        temp_df = df
-    else:
-        query_str = "genre=='" + genre + "'"
-        temp_df = df.query(query_str)
+def create_treemap_count_cube(df):
+    # Count the movies by genre, year and country, once
+    treemap_cube = common.create_count_cube(
+        df=df,
+        dim_col_names=['planete', 'continent', 'pays'],
+        count_col_name='genre'
+    )
+
+    return treemap_cube
+
+
+def query_data_for_treemap(treemap_cube, genre, from_year, to_year):
     
-    # Extract data corresponding to the right years
-    query_str = "anneeSortie>=" + str(from_year)
-    temp_df = temp_df.query(query_str)
-    query_str = "anneeSortie<=" + str(to_year)
-    temp_df = temp_df.query(query_str)
-        
-    # Aggregate agnostic to years
-    temp_df = (temp_df
-        .groupby(['planete', 'continent', 'pays'])
-        .agg(nombreDeFilms=pd.NamedAgg(column='genre', aggfunc='count'))
-        .reset_index()
+    # Aggregate agnostic to years, for the right genre and years
+    temp_df = common.query_count_cube(
+        cube=treemap_cube,
+        genre=genre,
+        from_year=from_year,
+        to_year=to_year,
+        count_col_name='nombreDeFilms'
     )
+
     return temp_df
 
 
-def create_treemap_fig(df, year_min, year_max):
+def create_treemap_trace(temp_df):
+    # Countries found in the period
+    temp_df = temp_df[temp_df['nombreDeFilms'] > 0]
+    rows = list(zip(
+        temp_df['planete'].tolist(),
+        temp_df['continent'].tolist(),
+        temp_df['pays'].tolist(),
+        temp_df['nombreDeFilms'].tolist()
+    ))
+
+    # Same trace as px.treemap with path=['planete', 'continent', 'pays'] and hover_name='pays'
+    trace = {
+        'type': 'treemap',
+        'branchvalues': 'total',
+        'domain': {'x': [0.0, 1.0], 'y': [0.0, 1.0]},
+        'hovertemplate': get_treemap_hover_template(),
+        'name': '',
+        'marker': {'line': {'color': 'grey'}},
+        'ids': [],
+        'labels': [],
+        'parents': [],
+        'values': [],
+        'hovertext': [],
+    }
+
+    # From the countries to the planet, each level is grouped and sorted by its path read backwards
+    for depth in [3, 2, 1]:
+        groups = {}
+        for row in rows:
+            group = groups.setdefault(tuple(reversed(row[:depth])), [0, set()])
+            group[0] += row[3]
+            group[1].add(row[2])
+
+        for key in sorted(groups):
+            value, countries = groups[key]
+            path = key[::-1]
+            trace['ids'].append('/'.join(path))
+            trace['labels'].append(key[0])
+            trace['parents'].append('/'.join(path[:-1]))
+            trace['values'].append(value)
+            trace['hovertext'].append(next(iter(countries)) if len(countries) == 1 else "(?)")
+
+    return trace
+
+
+def create_treemap_fig_for_data(temp_df):
+    # Create trace, as px.treemap a period without movies has no trace
+    trace = create_treemap_trace(temp_df=temp_df)
+    data = [trace] if len(trace['ids']) > 0 else []
+
+    # Create a figure as px.treemap does, without its groupbys and validation
+    fig = figure_dict.create_figure(
+        data=data,
+        layout=dict(
+            legend=dict(tracegroupgap=0),
+            treemapcolorway=px.colors.sequential.BuPu,
+            #height=500,
+            margin=dict(l=0,r=0,b=20,t=20),
+            paper_bgcolor='rgba(0,0,0,0)',
+            plot_bgcolor='rgba(0,0,0,0)'
+        )
+    )
+
+    return fig
+
+
+def create_treemap_fig(treemap_cube, year_min, year_max):
     # Get data
     temp_df = query_data_for_treemap(
-        df=df, 
+        treemap_cube=treemap_cube, 
         genre='All', 
         from_year=year_min, 
         to_year=year_max
     )
     
-    # Create a figure with px
-    fig = px.treemap(
-        temp_df, 
-        path=['planete', 'continent', 'pays'], 
-        values='nombreDeFilms',
-        hover_name="pays",
-        color_discrete_sequence=px.colors.sequential.BuPu,
-    )
+    # Create a fig
+    fig = create_treemap_fig_for_data(temp_df=temp_df)
 
-    fig.update_traces(
-        hovertemplate=get_treemap_hover_template(),
-        marker_line=dict(
-            color='grey'
-        )
-    )
-        
-    fig.update_layout(
-        #height=500,
-        margin=dict(l=0,r=0,b=20,t=20),
-        paper_bgcolor='rgba(0,0,0,0)',
-        plot_bgcolor='rgba(0,0,0,0)'
-    )
     return fig
 
 
+def create_treemap_store(treemap_cube, treemap_fig, treemap_title):
+    # Counts, figure and title rebuilt in the browser when the genre or the years change, see Assets/treemap.js
+    treemap_store = dcc.Store(
+        id='treemap-store',
+        data={
+            'cube': common.create_compact_count_cube(cube=treemap_cube),
+            'figure': treemap_fig,
+            'title': treemap_title.to_plotly_json(),
+        },
+    )
+
+    return treemap_store
+
+
 def create_treemap_graph(treemap_fig):
     treemap_graph = dcc.Graph(
         figure=treemap_fig,
@@ -181,7 +246,7 @@ def create_treemap_graph(treemap_fig):
     return treemap_graph
 
 
-def create_treemap(treemap_title, treemap_rs, treemap_ddm, treemap_graph):
+def create_treemap(treemap_title, treemap_rs, treemap_ddm, treemap_graph, treemap_store=None):
     
     treemap = html.Div(
         style={'width' : '600px'}, 
@@ -190,6 +255,6 @@ def create_treemap(treemap_title, treemap_rs, treemap_ddm, treemap_graph):
             treemap_ddm,
             treemap_graph,
             treemap_rs
-        ]
+        ] + ([treemap_store] if treemap_store is not None else [])
     )
     return treemap
\ No newline at end of file
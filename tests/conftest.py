@@ -0,0 +1,16 @@
+#
+# This file contains the setup shared by the tests.
+#
+
+
+# External lib
+import os
+import sys
+
+
+# Global variable
+repo_path = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# The modules are imported as the app imports them, and read the data relative to the repo
+sys.path.insert(0, os.path.join(repo_path, "Src"))
+os.chdir(repo_path)
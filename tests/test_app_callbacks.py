@@ -0,0 +1,182 @@
+#
+# This file contains the tests of the callbacks registered by the app, i.e. which outputs each input updates.
+#
+
+
+# External lib
+import importlib
+import warnings
+import pandas as pd
+import pytest
+
+
+# Local lib
+import preprocess_vsBackEnd
+
+
+def create_preprocessed_dfs():
+    # A few films, enough for every figure of the app, the preprocessed files are not committed
+    return {
+        "p_sunburst.feather": pd.DataFrame({
+            'titreOriginal': ["Film 1", "Film 2", "Film 3"],
+            'genreIdentifiant': ["Films", "Vidéos", "Films"],
+            'genre': ["DRAME", "DOCUMENTAIRE", ""],
+            'sousGenre0': ["Comédie dramatique", "", ""],
+            'sousGenre1': ["Satire", "", ""],
+        }),
+        "p_bumpchart.feather": pd.DataFrame({
+            'decennie': [1970, 1970, 1980, 1980],
+            'genre': ["Drame", "Documentaire", "Drame", "Documentaire"],
+            'compte': [3, 1, 2, 4],
+            'rang': [1, 2, 2, 1],
+        }),
+        "p_treemap.feather": pd.DataFrame({
+            'titreOriginal': ["Film 1", "Film 2", "Film 3"],
+            'anneeSortie': [1975, 1982, 1988],
+            'planete': ["Terre", "Terre", "Terre"],
+            'continent': ["Amérique", "Europe", "Amérique"],
+            'pays': ["Canada", "France", "Canada"],
+            'genre': ["Drame", "Documentaire", "Drame"],
+        }),
+        "p_table.feather": pd.DataFrame({
+            'titreOriginal': ["Film 1", "Film 2", "Film 3"],
+            'anneeSortie': [1975, 1982, 1988],
+            'langue': ["Français", "Français", "Anglais"],
+            'genre': ["Drame", "Documentaire", "Drame"],
+        }),
+        # The bar chart only shows the persons with 5 distinctions or more
+        "p_distinction.feather": pd.DataFrame({
+            'nomComplet': ["Étienne Desrosiers"] * 5 + ["Anne Claire Poirier"],
+            'lienWikidata': ["http://www.wikidata.org/entity/Q" + str(i) for i in range(6)],
+            'distinction': ["Prix Jutra", "Prix Génie", "Prix Génie", "Prix Gémeaux", "Prix Jutra", "Prix Albert-Tessier"],
+            'date': pd.to_datetime(["1999-01-01", "2004-01-01", "2005-01-01", "2010-01-01", "2012-01-01", "1988-01-01"]),
+            'annee': [1999, 2004, 2005, 2010, 2012, 1988],
+        }),
+        "p_h_barchart.feather": pd.DataFrame({
+            'nomComplet': ["Étienne Desrosiers", "Étienne Desrosiers", "Anne Claire Poirier"],
+            'genre': ["Drame", "Documentaire", "Drame"],
+            'nombreDeFilms': [2, 1, 4],
+        }),
+        "p_h_barchart_decade.feather": pd.DataFrame({
+            'nomComplet': ["Étienne Desrosiers", "Étienne Desrosiers", "Anne Claire Poirier"],
+            'genre': ["Drame", "Documentaire", "Drame"],
+            'debutDecennie': [1970, 1980, 1980],
+            'nombreDeFilms': [2, 1, 4],
+        }),
+        "p_avg.feather": pd.DataFrame({
+            'genre': ["Drame", "Documentaire"],
+            'moyenne': [3.0, 1.0],
+        }),
+    }
+
+
+@pytest.fixture(scope='module')
+def app(tmp_path_factory):
+    # The app loads its data when imported, from the files written here
+    data_path = tmp_path_factory.mktemp("data")
+    relative_path = preprocess_vsBackEnd.relative_path
+    preprocess_vsBackEnd.relative_path = str(data_path) + "/"
+    try:
+        for file_name, df in create_preprocessed_dfs().items():
+            preprocess_vsBackEnd.create_preprocessed_file_from_df(df=df, file_name=file_name)
+
+        # No manifest is written, the files cannot be checked against the raw files
+        with warnings.catch_warnings():
+            warnings.simplefilter('ignore')
+            app = importlib.import_module("app")
+    finally:
+        preprocess_vsBackEnd.relative_path = relative_path
+
+    return app
+
+
+def get_outputs_by_input(app):
+    # Every output of the callbacks, server or clientside, by input id.property
+    outputs_by_input = {}
+    for output_ids, callback_spec in app.app.callback_map.items():
+        # A multi output callback is written as ..id.property...id.property..
+        outputs = set(output_ids.strip('.').split('...'))
+        for input_spec in callback_spec['inputs']:
+            input_id = input_spec['id'] + '.' + input_spec['property']
+            outputs_by_input.setdefault(input_id, set()).update(outputs)
+
+    return outputs_by_input
+
+
+def test_treemap_inputs_reach_only_the_treemap(app):
+    outputs_by_input = get_outputs_by_input(app=app)
+
+    treemap_outputs = {'treemap-title.children', 'treemap-graph.figure'}
+    assert outputs_by_input['treemap-dropdown-menu.value'] == treemap_outputs
+    assert outputs_by_input['treemap-range-slider.value'] == treemap_outputs
+
+
+def test_bumpchart_dropdown_menu_reaches_the_bumpchart_and_the_table(app):
+    outputs_by_input = get_outputs_by_input(app=app)
+
+    assert outputs_by_input['bumpchart-dropdown-menu.value'] == {
+        'bumpchart-graph.figure',
+        'table-title.children',
+        'table-top-n-graph.figure',
+        'table-latest-graph.figure',
+        'table-oldest-graph.figure',
+    }
+
+
+def test_table_inputs_reach_only_the_table(app):
+    outputs_by_input = get_outputs_by_input(app=app)
+
+    table_outputs = {
+        'table-title.children',
+        'table-top-n-graph.figure',
+        'table-latest-graph.figure',
+        'table-oldest-graph.figure',
+    }
+    assert outputs_by_input['table-range-slider.value'] == table_outputs
+
+    # The latest and oldest films do not depend on n, they are only recomputed with the server filtering
+    if app.clientside_filtering:
+        assert outputs_by_input['table-slider.value'] == {'table-title.children', 'table-top-n-graph.figure'}
+    else:
+        assert outputs_by_input['table-slider.value'] == table_outputs
+
+
+def test_barchart_click_reaches_only_the_barchart_table(app):
+    outputs_by_input = get_outputs_by_input(app=app)
+
+    assert outputs_by_input['barchart-graph.clickData'] == {'barchart-table-graph.figure'}
+
+
+def test_h_barchart_inputs_reach_only_the_h_barchart(app):
+    outputs_by_input = get_outputs_by_input(app=app)
+
+    assert outputs_by_input['hbarchart-dropdown-menu.value'] == {'h-barchart-graph.figure'}
+    assert outputs_by_input['hbarchart-dropdown-menu.search_value'] == {'hbarchart-dropdown-menu.options'}
+
+    # The baselines by period are only shown when p_h_barchart_decade.feather is built
+    if app.h_barchart_tensor is not None:
+        assert outputs_by_input['hbarchart-baseline-radio-items.value'] == {
+            'h-barchart-graph.figure',
+            'hbarchart-range-slider.disabled',
+        }
+        assert outputs_by_input['hbarchart-range-slider.value'] == {'h-barchart-graph.figure'}
+    else:
+        assert 'hbarchart-baseline-radio-items.value' not in outputs_by_input
+        assert 'hbarchart-range-slider.value' not in outputs_by_input
+
+
+def test_every_input_is_tested(app):
+    outputs_by_input = get_outputs_by_input(app=app)
+
+    assert set(outputs_by_input) <= {
+        'treemap-dropdown-menu.value',
+        'treemap-range-slider.value',
+        'bumpchart-dropdown-menu.value',
+        'table-range-slider.value',
+        'table-slider.value',
+        'barchart-graph.clickData',
+        'hbarchart-dropdown-menu.value',
+        'hbarchart-dropdown-menu.search_value',
+        'hbarchart-baseline-radio-items.value',
+        'hbarchart-range-slider.value',
+    }
@@ -0,0 +1,109 @@
+#
+# This file contains the tests of the memory mapped preprocessed files, i.e. that the workers forked from the app share them.
+#
+
+
+# External lib
+import os
+import numpy as np
+import pandas as pd
+import pytest
+
+
+# Local lib
+import preprocess_vsBackEnd
+
+
+# Global variable
+worker_count = 4
+row_count = 1000000
+
+pytestmark = pytest.mark.skipif(
+    not hasattr(os, 'fork') or not os.path.isfile("/proc/self/status"),
+    reason="RSS is read from /proc/self/status, Linux only"
+)
+
+
+def get_private_rss():
+    # The pages of the memory mapped files are counted in RssFile, shared by the page cache
+    with open("/proc/self/status") as file:
+        for line in file:
+            if line.startswith("RssAnon:"):
+                return int(line.split()[1]) * 1024
+
+
+def create_h_barchart_dfs(row_count):
+    # Many rows, as the tensors of the app, with missing years
+    rng = np.random.default_rng(seed=0)
+    names = np.array(["producteur " + str(i) for i in range(5000)], dtype='object')
+    genres = np.array(["action", "comédie", "drame", "sf", ""], dtype='object')
+    h_barchart_df = pd.DataFrame({
+        'nomComplet': names[rng.integers(len(names), size=row_count)],
+        'genre': genres[rng.integers(len(genres), size=row_count)],
+        'nombreDeFilms': rng.integers(1, 100, size=row_count),
+    })
+    h_barchart_decade_df = h_barchart_df.assign(
+        debutDecennie=pd.array(rng.integers(190, 203, size=row_count) * 10, dtype='Int64')
+    )
+    h_barchart_decade_df.loc[::100, 'debutDecennie'] = pd.NA
+
+    return {
+        "p_h_barchart.feather": h_barchart_df,
+        "p_h_barchart_decade.feather": h_barchart_decade_df,
+    }
+
+
+def touch_df(df):
+    # Read every value of the memory mapped columns, as the callbacks do when they aggregate
+    total = 0
+    for col_name in df.columns:
+        column = df[col_name]
+        if isinstance(column.dtype, pd.CategoricalDtype):
+            column = column.cat.codes
+        total += int(column.sum())
+
+    return total
+
+
+def run_worker(dfs):
+    # Private memory allocated by the worker to read the dfs, sent back to the parent
+    read_fd, write_fd = os.pipe()
+    pid = os.fork()
+    if pid == 0:
+        exit_code = 1
+        try:
+            os.close(read_fd)
+            rss_before = get_private_rss()
+            for df in dfs:
+                touch_df(df)
+            rss_after = get_private_rss()
+            os.write(write_fd, str(rss_after - rss_before).encode('ascii'))
+            exit_code = 0
+        finally:
+            # Never return to pytest from the worker
+            os._exit(exit_code)
+
+    os.close(write_fd)
+    with os.fdopen(read_fd) as file:
+        output = file.read()
+    _, status = os.waitpid(pid, 0)
+    assert os.waitstatus_to_exitcode(status) == 0
+
+    return int(output)
+
+
+def test_forked_workers_share_the_preprocessed_files(tmp_path, monkeypatch):
+    monkeypatch.setattr(preprocess_vsBackEnd, 'relative_path', str(tmp_path) + "/")
+    for file_name, df in create_h_barchart_dfs(row_count=row_count).items():
+        preprocess_vsBackEnd.create_preprocessed_file_from_df(df=df, file_name=file_name)
+    data_size = sum(os.path.getsize(path) for path in tmp_path.iterdir())
+
+    # Load once in the parent, as the app does before its workers are forked
+    dfs = [
+        preprocess_vsBackEnd.load_preprocessed_h_barchart_file(),
+        preprocess_vsBackEnd.load_preprocessed_h_barchart_decade_file(),
+    ]
+    rss_deltas = [run_worker(dfs=dfs) for _ in range(worker_count)]
+
+    # Each worker reads the shared pages, it only allocates the temporary arrays of the sums
+    assert all(rss_delta < data_size / 10 for rss_delta in rss_deltas), (rss_deltas, data_size)